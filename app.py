@@ -6,11 +6,28 @@ from datetime import datetime, timedelta
 import json
 import time
 import random
+import os
+from collections import deque
+from itertools import islice
 
 from cognitive_agent import CognitiveAgent
 from email_simulator import EmailSimulator
 from steganography import SteganographyModule
 from email_fetcher import RealEmailFetcher
+from email_query import EmailQuery
+from message_store import MessageStore
+from fetch_worker import FetchJob
+from stealth_store import StealthImageStore
+from html_text import clean_text
+
+# Stealth log entries kept per session; older ones drop off (images stay on disk)
+STEALTH_LOG_LIMIT = int(os.getenv('STEALTH_LOG_LIMIT', '200'))
+
+# Rows per page offered on the Feedback History page
+HISTORY_PAGE_SIZES = [25, 50, 100, 250]
+
+# Seconds between checks on a running background fetch
+FETCH_POLL_INTERVAL = 0.5
 
 # Page configuration
 st.set_page_config(
@@ -20,24 +37,30 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource
+def get_shared_agent():
+    """One agent per server process: sessions share its memory and its lock"""
+    return CognitiveAgent()
+
 # Initialize session state
 if 'agent' not in st.session_state:
-    st.session_state.agent = CognitiveAgent()
+    st.session_state.agent = get_shared_agent()
 
 if 'email_simulator' not in st.session_state:
     st.session_state.email_simulator = EmailSimulator()
 
 if 'steganography' not in st.session_state:
-    st.session_state.steganography = SteganographyModule()
+    st.session_state.steganography = SteganographyModule(image_store=StealthImageStore())
 
 if 'current_email' not in st.session_state:
     st.session_state.current_email = None
 
-if 'stealth_logs' not in st.session_state:
-    st.session_state.stealth_logs = []
+# Prediction shown for current_email; reruns and feedback reuse it
+if 'current_prediction' not in st.session_state:
+    st.session_state.current_prediction = None
 
-if 'feedback_history' not in st.session_state:
-    st.session_state.feedback_history = []
+if 'stealth_logs' not in st.session_state:
+    st.session_state.stealth_logs = deque(maxlen=STEALTH_LOG_LIMIT)
 
 if 'email_fetcher' not in st.session_state:
     st.session_state.email_fetcher = None
@@ -48,6 +71,16 @@ if 'use_real_emails' not in st.session_state:
 if 'fetched_emails' not in st.session_state:
     st.session_state.fetched_emails = []
 
+if 'message_store' not in st.session_state:
+    st.session_state.message_store = MessageStore()
+
+# Running background Gmail fetch, and the outcome of the last one
+if 'fetch_job' not in st.session_state:
+    st.session_state.fetch_job = None
+
+if 'fetch_result' not in st.session_state:
+    st.session_state.fetch_result = None
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -592,58 +625,52 @@ def main():
                 if st.session_state.email_fetcher is None:
                     st.session_state.email_fetcher = RealEmailFetcher("blackhole01729@gmail.com", app_password)
                 
+                # The fetcher holds one IMAP connection, so it serves one job at a time
+                fetching = st.session_state.fetch_job is not None
+                
                 # Test connection
-                if st.button("🔗 Test Connection", use_container_width=True):
+                if st.button("🔗 Test Connection", use_container_width=True, disabled=fetching):
                     if st.session_state.email_fetcher.connect():
                         st.success("✅ Connected to Gmail successfully!")
                         st.session_state.email_fetcher.disconnect()
                     else:
                         st.error("❌ Failed to connect. Check your App Password.")
                 
+                # Fetch health: retries, latencies and circuit breaker state
+                with st.expander("📡 Fetch Metrics"):
+                    st.caption(f"Circuit: {st.session_state.email_fetcher.breaker.state}")
+                    st.json(st.session_state.email_fetcher.metrics.as_dict())
+                
                 # Fetch real emails
                 col1, col2 = st.columns(2)
                 
                 with col1:
-                    if st.button("📬 Fetch Recent Emails", use_container_width=True):
-                        with st.spinner("📥 Fetching recent emails from Gmail..."):
-                            emails = st.session_state.email_fetcher.fetch_recent_emails(10)
-                            if emails:
-                                st.session_state.fetched_emails = emails
-                                st.success(f"✅ Fetched {len(emails)} recent emails!")
-                                st.rerun()
-                            else:
-                                st.error("❌ No emails found or connection failed.")
+                    if st.button("📬 Fetch Recent Emails", use_container_width=True, disabled=fetching):
+                        start_fetch('ALL', "recent emails")
                 
                 with col2:
                     # Search by sender
                     sender_search = st.text_input("🔍 Search by sender email:", placeholder="e.g., support@company.com")
-                    if st.button("🔍 Search Sender", use_container_width=True):
+                    if st.button("🔍 Search Sender", use_container_width=True, disabled=fetching):
                         if sender_search:
-                            with st.spinner(f"📥 Searching emails from {sender_search}..."):
-                                emails = st.session_state.email_fetcher.fetch_emails_by_sender(sender_search, 10)
-                                if emails:
-                                    st.session_state.fetched_emails = emails
-                                    st.success(f"✅ Found {len(emails)} emails from {sender_search}!")
-                                    st.rerun()
-                                else:
-                                    st.error(f"❌ No emails found from {sender_search}")
+                            start_fetch(EmailQuery(sender=sender_search), f"emails from {sender_search}")
                         else:
                             st.error("❌ Please enter a sender email address")
                 
+                # Progress of a running fetch, or the outcome of the last one
+                if st.session_state.fetch_job is not None:
+                    fetch_progress()
+                elif st.session_state.fetch_result:
+                    kind, message = st.session_state.fetch_result
+                    getattr(st, kind)(message)
+                
                 # Email selection
                 if st.session_state.fetched_emails:
                     st.subheader(f"📧 Select Email to Analyze ({len(st.session_state.fetched_emails)} emails available)")
                     
                     # Refresh button
-                    if st.button("🔄 Refresh Email List", use_container_width=True):
-                        with st.spinner("📥 Refreshing emails..."):
-                            emails = st.session_state.email_fetcher.fetch_recent_emails(10)
-                            if emails:
-                                st.session_state.fetched_emails = emails
-                                st.success(f"✅ Refreshed! {len(emails)} emails available.")
-                                st.rerun()
-                            else:
-                                st.error("❌ Failed to refresh emails.")
+                    if st.button("🔄 Refresh Email List", use_container_width=True, disabled=fetching):
+                        start_fetch('ALL', "recent emails")
                     
                     # Create email options for selection
                     email_options = []
@@ -671,10 +698,11 @@ def main():
                     
                     # Analyze selected email button
                     if st.button("🔍 Analyze Selected Email", use_container_width=True):
-                        st.session_state.current_email = selected_email
-                        
-                        # Get agent prediction
-                        prediction = st.session_state.agent.predict_action(st.session_state.current_email)
+                        # Get agent prediction (cached for emails already analyzed)
+                        prediction = st.session_state.message_store.predict(
+                            st.session_state.agent, selected_email
+                        )
+                        set_current_email(selected_email, prediction)
                         
                         # Generate stealth log
                         stealth_entry = st.session_state.steganography.generate_stealth_log(
@@ -689,7 +717,8 @@ def main():
                     # Clear fetched emails
                     if st.button("🗑️ Clear Fetched Emails", use_container_width=True):
                         st.session_state.fetched_emails = []
-                        st.session_state.current_email = None
+                        st.session_state.message_store.clear()
+                        set_current_email(None)
                         st.success("✅ Cleared fetched emails!")
                         st.rerun()
         else:
@@ -704,15 +733,16 @@ def main():
             if random.random() < 0.3:  # 30% chance
                 email_types = ["urgent", "question", "newsletter"]
                 email_type = random.choice(email_types)
-                st.session_state.current_email = st.session_state.email_simulator.generate_specific_email(
+                email_data = st.session_state.email_simulator.generate_specific_email(
                     sender="blackhole01729@gmail.com",
                     subject_type=email_type
                 )
             else:
-                st.session_state.current_email = st.session_state.email_simulator.generate_email()
+                email_data = st.session_state.email_simulator.generate_email()
             
             # Get agent prediction
-            prediction = st.session_state.agent.predict_action(st.session_state.current_email)
+            prediction = st.session_state.agent.predict_action(email_data)
+            set_current_email(email_data, prediction)
             
             # Generate stealth log
             stealth_entry = st.session_state.steganography.generate_stealth_log(
@@ -726,10 +756,11 @@ def main():
         # Generate multiple emails
         if st.button("📬 Generate Inbox (10 emails)", use_container_width=True):
             inbox = st.session_state.email_simulator.generate_inbox(10)
-            for email in inbox:
-                prediction = st.session_state.agent.predict_action(email)
-                stealth_entry = st.session_state.steganography.generate_stealth_log(email, prediction)
-                st.session_state.stealth_logs.append(stealth_entry)
+            predictions = [st.session_state.agent.predict_action(email) for email in inbox]
+            # One shared atlas image for the whole batch instead of ten PNGs
+            st.session_state.stealth_logs.extend(
+                st.session_state.steganography.generate_stealth_atlas(inbox, predictions)
+            )
             st.rerun()
         
         st.divider()
@@ -740,11 +771,10 @@ def main():
         epsilon = st.slider("Exploration Rate (Epsilon)", 0.0, 1.0, st.session_state.agent.epsilon, 0.05)
         
         if learning_rate != st.session_state.agent.learning_rate or epsilon != st.session_state.agent.epsilon:
-            st.session_state.agent.learning_rate = learning_rate
-            st.session_state.agent.epsilon = epsilon
+            st.session_state.agent.set_parameters(learning_rate, epsilon)
         
-        # Statistics
-        stats = st.session_state.agent.get_statistics()
+        # Statistics only; the dashboard figures are cached separately
+        stats = dashboard_stats(st.session_state.agent, st.session_state.agent.feedback_version)
         st.subheader("📊 Quick Stats")
         st.metric("Total Feedback", stats['total_feedback'])
         st.metric("Approval Rate", f"{stats['approval_rate']:.1%}")
@@ -770,9 +800,7 @@ def main():
         st.markdown('<div class="prediction-header">🤖 Agent Prediction</div>', unsafe_allow_html=True)
         
         if st.session_state.current_email:
-            # Get latest prediction
-            prediction = st.session_state.agent.predict_action(st.session_state.current_email)
-            display_prediction_card(prediction)
+            display_prediction_card(st.session_state.current_prediction)
         else:
             st.markdown("""
             <div class="no-email-card">
@@ -781,30 +809,54 @@ def main():
             </div>
             """, unsafe_allow_html=True)
 
-def format_email_body(body_text):
-    """Format and clean email body text"""
-    if not body_text:
-        return "No content available"
-    
-    # Remove HTML-like tags and clean up the text
-    import re
-    
-    # Remove HTML tags
-    body_text = re.sub(r'<[^>]+>', '', body_text)
+def start_fetch(query, description):
+    """Start a Gmail fetch on a worker thread; fetch_progress polls it"""
+    if st.session_state.fetch_job is None:
+        st.session_state.fetch_result = None
+        st.session_state.fetch_job = FetchJob(
+            st.session_state.email_fetcher, query, 10,
+            known=set(st.session_state.message_store.messages),
+            description=description
+        ).start()
+
+@st.fragment(run_every=FETCH_POLL_INTERVAL)
+def fetch_progress():
+    """Show emails of the running fetch as they are parsed; rerun the app when it ends"""
+    job = st.session_state.fetch_job
+    if job is None:
+        return
     
-    # Remove common email artifacts
-    body_text = re.sub(r'\[image:.*?\]', '', body_text)  # Remove image placeholders
-    body_text = re.sub(r'\[.*?\]', '', body_text)  # Remove other brackets
+    # Only this script thread touches the message store
+    st.session_state.message_store.merge(job.take_new())
     
-    # Clean up URLs (make them readable)
-    body_text = re.sub(r'https?://[^\s]+', lambda m: f"🔗 {m.group(0)}", body_text)
+    if job.done:
+        st.session_state.fetch_job = None
+        if job.keys:
+            st.session_state.fetched_emails = st.session_state.message_store.get_many(job.keys)
+            st.session_state.fetch_result = (
+                'success', f"✅ Fetched {len(job.keys)} {job.description} ({len(job.emails)} new) in {job.elapsed:.1f}s!"
+            )
+        else:
+            st.session_state.fetch_result = ('error', f"❌ No {job.description} found or connection failed.")
+        st.rerun()
     
-    # Clean up excessive whitespace
-    body_text = re.sub(r'\n\s*\n', '\n\n', body_text)  # Remove excessive line breaks
-    body_text = re.sub(r' +', ' ', body_text)  # Remove multiple spaces
+    st.info(f"📥 Fetching {job.description}... {len(job.emails)} new so far ({job.elapsed:.0f}s)")
+    for email_data in job.emails[-5:]:
+        st.caption(f"📨 {email_data['subject'][:50]} - {email_data['sender']}")
+
+def set_current_email(email_data, prediction=None):
+    """Show an email with the prediction made for it, or clear both with None"""
+    st.session_state.current_email = email_data
+    st.session_state.current_prediction = prediction
+
+def format_email_body(body_text, already_clean=False):
+    """Format and clean email body text"""
+    if not body_text:
+        return "No content available"
     
-    # Clean up the text
-    body_text = body_text.strip()
+    # Fetched emails were cleaned once at parse time; only simulated ones still need it
+    if not already_clean:
+        body_text = clean_text(body_text)
     
     # Add some formatting for better readability
     lines = body_text.split('\n')
@@ -867,7 +919,7 @@ def display_email_card(email):
         
         # Email body
         with st.expander("📄 Email Body", expanded=False):
-            formatted_body = format_email_body(email['body'])
+            formatted_body = format_email_body(email['body'], already_clean=is_real_email)
             st.text_area("Email Content", value=formatted_body, height=200, disabled=True, label_visibility="collapsed")
         
         st.markdown("---")
@@ -932,20 +984,17 @@ def display_prediction_card(prediction):
 def handle_feedback(feedback_type, correct_action=None):
     """Handle user feedback and update agent"""
     if st.session_state.current_email:
-        # Get current prediction
-        prediction = st.session_state.agent.predict_action(st.session_state.current_email)
+        # Feedback applies to the prediction the user was shown
+        prediction = st.session_state.current_prediction
         
         # Update agent with feedback
-        feedback_entry = st.session_state.agent.receive_feedback(
+        st.session_state.agent.receive_feedback(
             st.session_state.current_email,
             prediction['action'],
             feedback_type,
             correct_action
         )
         
-        # Add to feedback history
-        st.session_state.feedback_history.append(feedback_entry)
-        
         # Show success message
         if feedback_type == 'approve':
             st.success("✅ Feedback recorded! Agent learning from approval.")
@@ -953,7 +1002,7 @@ def handle_feedback(feedback_type, correct_action=None):
             st.success("✅ Feedback recorded! Agent learning from correction.")
         
         # Clear current email
-        st.session_state.current_email = None
+        set_current_email(None)
         time.sleep(1)
         st.rerun()
 
@@ -961,7 +1010,8 @@ def show_dashboard():
     """Show the feedback dashboard with visualizations"""
     st.markdown('<h1 class="dashboard-header">📊 Analytics Dashboard</h1>', unsafe_allow_html=True)
     
-    stats = st.session_state.agent.get_statistics()
+    agent = st.session_state.agent
+    stats = dashboard_stats(agent, agent.feedback_version)
     
     if stats['total_feedback'] == 0:
         st.markdown("""
@@ -1020,65 +1070,98 @@ def show_dashboard():
     
     # Charts Section
     st.markdown('<h2 class="section-header">📈 Data Visualizations</h2>', unsafe_allow_html=True)
+    figures = dashboard_figures(agent, agent.feedback_version)
     
     col1, col2 = st.columns(2)
     
     with col1:
         # Action distribution with enhanced styling
-        if stats['top_actions']:
+        if 'actions' in figures:
             st.markdown('<div class="chart-container">', unsafe_allow_html=True)
             st.markdown('<div class="chart-title">🎯 Action Distribution</div>', unsafe_allow_html=True)
-            
-            actions_df = pd.DataFrame(stats['top_actions'], columns=['Action', 'Count'])
-            fig = px.bar(
-                actions_df, 
-                x='Action', 
-                y='Count',
-                color='Count',
-                color_continuous_scale='viridis',
-                title=''
-            )
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white', size=12),
-                xaxis=dict(gridcolor='rgba(255,255,255,0.1)'),
-                yaxis=dict(gridcolor='rgba(255,255,255,0.1)'),
-                margin=dict(l=20, r=20, t=40, b=20)
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(figures['actions'], use_container_width=True)
             st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
         # Top senders with enhanced styling
-        if stats['top_senders']:
+        if 'senders' in figures:
             st.markdown('<div class="chart-container">', unsafe_allow_html=True)
             st.markdown('<div class="chart-title">👥 Top Senders</div>', unsafe_allow_html=True)
-            
-            senders_df = pd.DataFrame(stats['top_senders'], columns=['Sender', 'Count'])
-            fig = px.pie(
-                senders_df, 
-                values='Count', 
-                names='Sender',
-                title='',
-                color_discrete_sequence=px.colors.qualitative.Set3
-            )
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white', size=12),
-                margin=dict(l=20, r=20, t=40, b=20)
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(figures['senders'], use_container_width=True)
             st.markdown('</div>', unsafe_allow_html=True)
     
     # Recent Performance Section
-    if stats['recent_performance']:
+    if 'performance' in figures:
         st.markdown('<h2 class="section-header">📈 Performance Trends</h2>', unsafe_allow_html=True)
         
         st.markdown('<div class="performance-card">', unsafe_allow_html=True)
         st.markdown('<div class="performance-title">🚀 Recent Performance Analytics</div>', unsafe_allow_html=True)
-        
+        st.plotly_chart(figures['performance'], use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+@st.cache_data(max_entries=4)
+def dashboard_stats(_agent, feedback_version):
+    """
+    Agent statistics for one feedback version
+
+    The agent is left out of the cache key (leading underscore); its
+    feedback_version changes on every update, so statistics are recomputed
+    only after new feedback, not on every page visit or rerun.
+    """
+    return _agent.get_statistics()
+
+@st.cache_resource(max_entries=2)
+def dashboard_figures(_agent, feedback_version):
+    """
+    Dashboard figures for one feedback version
+
+    Kept as shared objects rather than in st.cache_data, which would
+    unpickle all three figures on every hit; st.plotly_chart only reads them.
+    """
+    return build_dashboard_figures(dashboard_stats(_agent, feedback_version))
+
+def build_dashboard_figures(stats):
+    """Plotly figures for the dashboard charts, keyed by chart"""
+    figures = {}
+    
+    if stats['top_actions']:
+        actions_df = pd.DataFrame(stats['top_actions'], columns=['Action', 'Count'])
+        fig = px.bar(
+            actions_df, 
+            x='Action', 
+            y='Count',
+            color='Count',
+            color_continuous_scale='viridis',
+            title=''
+        )
+        fig.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='white', size=12),
+            xaxis=dict(gridcolor='rgba(255,255,255,0.1)'),
+            yaxis=dict(gridcolor='rgba(255,255,255,0.1)'),
+            margin=dict(l=20, r=20, t=40, b=20)
+        )
+        figures['actions'] = fig
+    
+    if stats['top_senders']:
+        senders_df = pd.DataFrame(stats['top_senders'], columns=['Sender', 'Count'])
+        fig = px.pie(
+            senders_df, 
+            values='Count', 
+            names='Sender',
+            title='',
+            color_discrete_sequence=px.colors.qualitative.Set3
+        )
+        fig.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='white', size=12),
+            margin=dict(l=20, r=20, t=40, b=20)
+        )
+        figures['senders'] = fig
+    
+    if stats['recent_performance']:
         perf_df = pd.DataFrame(stats['recent_performance'])
         perf_df['timestamp'] = pd.to_datetime(perf_df['timestamp'])
         
@@ -1111,22 +1194,19 @@ def show_dashboard():
             paper_bgcolor='rgba(0,0,0,0)',
             font=dict(color='white', size=12),
             xaxis=dict(
-                title='Time',
-                gridcolor='rgba(255,255,255,0.1)',
-                titlefont=dict(color='white')
+                title=dict(text='Time', font=dict(color='white')),
+                gridcolor='rgba(255,255,255,0.1)'
             ),
             yaxis=dict(
-                title='Reward',
+                title=dict(text='Reward', font=dict(color='white')),
                 gridcolor='rgba(255,255,255,0.1)',
-                titlefont=dict(color='white'),
                 tickfont=dict(color='white')
             ),
             yaxis2=dict(
-                title='Confidence',
+                title=dict(text='Confidence', font=dict(color='white')),
                 overlaying='y', 
                 side='right',
                 gridcolor='rgba(255,255,255,0.1)',
-                titlefont=dict(color='white'),
                 tickfont=dict(color='white')
             ),
             legend=dict(
@@ -1136,9 +1216,9 @@ def show_dashboard():
             ),
             margin=dict(l=20, r=20, t=40, b=20)
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
-        st.markdown('</div>', unsafe_allow_html=True)
+        figures['performance'] = fig
+    
+    return figures
 
 def show_stealth_logs():
     """Show stealth logs with embedded data"""
@@ -1156,7 +1236,7 @@ def show_stealth_logs():
     st.markdown('<h2 class="section-header">🔍 Recent Stealth Operations</h2>', unsafe_allow_html=True)
     
     # Show recent logs with enhanced styling
-    for i, log in enumerate(reversed(st.session_state.stealth_logs[-10:])):  # Show last 10
+    for i, log in enumerate(islice(reversed(st.session_state.stealth_logs), 10)):  # Show last 10
         with st.expander(f"🔐 {log['subject']} - {log['emoji_trigger']}", expanded=False):
             st.markdown(f"""
             <div class="email-card">
@@ -1179,10 +1259,15 @@ def show_stealth_logs():
                 """, unsafe_allow_html=True)
             
             with col2:
-                # Decode stealth data
-                decoded = st.session_state.steganography.decode_stealth_data(log)
+                # Decode stealth data only on request; decoded images are cached by hash
+                stego = st.session_state.steganography
+                show_decoded = st.toggle("🔓 Decode hidden data", value=stego.is_decoded(log),
+                                         key=f"decode_{stego.image_key(log)}_{i}")
+                decoded = stego.decode_stealth_data(log) if show_decoded else None
                 
-                if 'error' not in decoded:
+                if decoded is None:
+                    st.caption("Hidden payload not decoded yet")
+                elif 'error' not in decoded:
                     st.markdown("""
                     <div style="background: linear-gradient(135deg, #00d4aa 0%, #00b894 100%); 
                                 border-radius: 15px; padding: 1rem; color: white; margin-bottom: 1rem;">
@@ -1211,7 +1296,11 @@ def show_feedback_history():
     """Show detailed feedback history"""
     st.markdown('<h1 class="dashboard-header">📝 Learning History</h1>', unsafe_allow_html=True)
     
-    if not st.session_state.feedback_history:
+    # Read straight from the agent's store, the same data the dashboard uses
+    history = st.session_state.agent.feedback_history
+    summary = history.summary()
+    
+    if not summary['total']:
         st.markdown("""
         <div class="no-data-card">
             <div class="no-data-icon">📝</div>
@@ -1222,15 +1311,11 @@ def show_feedback_history():
     
     st.markdown('<h2 class="section-header">🔍 Feedback Analytics</h2>', unsafe_allow_html=True)
     
-    # Convert to DataFrame for better display
-    df = pd.DataFrame(st.session_state.feedback_history)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    
-    # Summary metrics
+    # Summary metrics, aggregated in the database
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_feedback = len(df)
+        total_feedback = summary['total']
         st.markdown(f"""
         <div class="metric-card">
             <div class="metric-icon">📊</div>
@@ -1240,7 +1325,7 @@ def show_feedback_history():
         """, unsafe_allow_html=True)
     
     with col2:
-        approvals = len(df[df['user_feedback'] == 'approve'])
+        approvals = summary['approvals']
         approval_rate = (approvals / total_feedback * 100) if total_feedback > 0 else 0
         st.markdown(f"""
         <div class="metric-card">
@@ -1251,7 +1336,7 @@ def show_feedback_history():
         """, unsafe_allow_html=True)
     
     with col3:
-        unique_senders = df['sender'].nunique()
+        unique_senders = summary['unique_senders']
         st.markdown(f"""
         <div class="metric-card">
             <div class="metric-icon">👥</div>
@@ -1261,7 +1346,7 @@ def show_feedback_history():
         """, unsafe_allow_html=True)
     
     with col4:
-        avg_reward = df['reward'].mean() if 'reward' in df.columns else 0
+        avg_reward = summary['avg_reward']
         st.markdown(f"""
         <div class="metric-card">
             <div class="metric-icon">🎯</div>
@@ -1288,23 +1373,34 @@ def show_feedback_history():
     with col2:
         sender_filter = st.selectbox(
             "Filter by sender:", 
-            ['All'] + list(df['sender'].unique()),
+            ['All'] + history.senders(),
             help="Choose to filter by specific email senders"
         )
     
     st.markdown('</div>', unsafe_allow_html=True)
     
-    # Apply filters
-    filtered_df = df.copy()
-    if feedback_filter != 'All':
-        filtered_df = filtered_df[filtered_df['user_feedback'] == feedback_filter]
-    if sender_filter != 'All':
-        filtered_df = filtered_df[filtered_df['sender'] == sender_filter]
+    # Filters run as indexed queries; only the visible page is loaded
+    filters = {
+        'feedback': None if feedback_filter == 'All' else feedback_filter,
+        'sender': None if sender_filter == 'All' else sender_filter
+    }
+    matching = history.count(**filters)
     
     # Display filtered data with enhanced styling
     st.markdown('<h2 class="section-header">📋 Detailed Records</h2>', unsafe_allow_html=True)
     
-    if len(filtered_df) > 0:
+    if matching > 0:
+        col1, col2 = st.columns(2)
+        with col1:
+            page_size = st.selectbox("Rows per page:", HISTORY_PAGE_SIZES, index=1)
+        with col2:
+            page_count = (matching - 1) // page_size + 1
+            page_number = st.number_input("Page:", min_value=1, max_value=page_count, value=1,
+                                          help=f"{page_count} pages, newest records first")
+        
+        page_df = pd.DataFrame(history.page((page_number - 1) * page_size, page_size, **filters))
+        page_df['timestamp'] = pd.to_datetime(page_df['timestamp'])
+        
         # Style the dataframe
         st.markdown("""
         <style>
@@ -1319,7 +1415,7 @@ def show_feedback_history():
         
         # Display with custom styling
         st.dataframe(
-            filtered_df,
+            page_df,
             use_container_width=True,
             column_config={
                 "timestamp": st.column_config.DatetimeColumn("🕒 Timestamp"),
@@ -1335,7 +1431,7 @@ def show_feedback_history():
         st.markdown(f"""
         <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                     border-radius: 15px; padding: 1rem; color: white; margin-top: 1rem;">
-            <strong>📊 Showing {len(filtered_df)} records</strong> 
+            <strong>📊 Showing {len(page_df)} of {matching} records</strong> 
             {f"for {feedback_filter} feedback" if feedback_filter != 'All' else ''}
             {f"from {sender_filter}" if sender_filter != 'All' else ''}
         </div>
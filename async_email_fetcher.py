@@ -0,0 +1,125 @@
+import asyncio
+import copy
+import time
+from typing import List, Dict, Any, AsyncIterator, Iterable, Tuple, Union
+
+from email_fetcher import RealEmailFetcher
+from email_query import EmailQuery
+
+# Gmail exposes its system labels under the [Gmail] namespace; inbox
+# categories such as Updates and Promotions are only reachable through search,
+# so they are given as (folder, query) sources.
+DEFAULT_FOLDERS = ('INBOX',)
+
+# Gmail's main inbox tabs as sources, one search each
+GMAIL_CATEGORIES = (
+    ('INBOX', EmailQuery(gmail_raw='category:primary')),
+    ('INBOX', EmailQuery(gmail_raw='category:updates')),
+    ('INBOX', EmailQuery(gmail_raw='category:promotions')),
+)
+
+Source = Union[str, Tuple[str, Union[str, EmailQuery]]]
+
+_DONE = object()
+
+
+class AsyncEmailFetcher:
+    def __init__(self, accounts: Iterable[Union[RealEmailFetcher, Tuple[str, str]]],
+                 folders: Iterable[Source] = DEFAULT_FOLDERS, max_concurrency: int = 4):
+        """
+        Fetch several folders of several accounts concurrently
+
+        Args:
+            accounts: RealEmailFetcher instances or (email_address, app_password) pairs
+            folders: Sources to read from every account: a mailbox name, or a
+                (mailbox, query) pair whose query replaces the one given to
+                stream_emails, e.g. GMAIL_CATEGORIES
+            max_concurrency: Upper bound on IMAP connections open at the same time
+        """
+        self.accounts = [
+            account if isinstance(account, RealEmailFetcher) else RealEmailFetcher(*account)
+            for account in accounts
+        ]
+        self.folders = list(folders)
+        self.max_concurrency = max(1, max_concurrency)
+        self.timings = {}
+
+    @staticmethod
+    def source_name(source: Source) -> str:
+        """Label for a source: the folder, plus the query when it has one"""
+        if isinstance(source, str):
+            return source
+        folder, query = source
+        if isinstance(query, EmailQuery):
+            query = query.gmail_raw or repr(query)
+        return f"{folder} {query}"
+
+    def _jobs(self) -> List[Tuple[RealEmailFetcher, Source]]:
+        """One job per (account, source) pair, each with its own connection"""
+        jobs = []
+        for account in self.accounts:
+            for source in self.folders:
+                # imaplib connections are not thread-safe, so every job gets a
+                # fresh fetcher carrying the account's settings
+                worker = copy.copy(account)
+                worker.__dict__.pop('mail', None)
+                jobs.append((worker, source))
+        return jobs
+
+    async def stream_emails(self, query: Union[str, EmailQuery] = 'ALL', limit: int = 10) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield parsed emails from every account and source as soon as each one arrives
+
+        Each email is tagged with its 'account', 'folder' and 'source' (see source_name).
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.timings = {}
+
+        def run_job(fetcher, source):
+            folder, source_query = (source, query) if isinstance(source, str) else source
+            name = self.source_name(source)
+            started = time.perf_counter()
+            try:
+                for email_data in fetcher.iter_emails(source_query, limit, folder):
+                    email_data['folder'] = folder
+                    email_data['source'] = name
+                    email_data['account'] = fetcher.email_address
+                    if loop.is_closed():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, email_data)
+            finally:
+                self.timings[(fetcher.email_address, name)] = time.perf_counter() - started
+
+        async def job(fetcher, source):
+            async with semaphore:
+                try:
+                    await asyncio.to_thread(run_job, fetcher, source)
+                except Exception as e:
+                    print(f"❌ Error fetching {self.source_name(source)} for {fetcher.email_address}: {e}")
+
+        async def run_all():
+            try:
+                await asyncio.gather(*(job(fetcher, source) for fetcher, source in self._jobs()))
+            finally:
+                queue.put_nowait(_DONE)
+
+        runner = asyncio.create_task(run_all())
+        try:
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            if not runner.done():
+                runner.cancel()
+
+    async def fetch_all(self, query: Union[str, EmailQuery] = 'ALL', limit: int = 10) -> List[Dict[str, Any]]:
+        """Collect every streamed email into a list"""
+        return [email_data async for email_data in self.stream_emails(query, limit)]
+
+    def fetch_all_sync(self, query: Union[str, EmailQuery] = 'ALL', limit: int = 10) -> List[Dict[str, Any]]:
+        """Blocking wrapper around fetch_all for non-async callers"""
+        return asyncio.run(self.fetch_all(query, limit))
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark for RealEmailFetcher against the local fake IMAP server
+Reports connect, search and fetch latency and fetch throughput for
+several mailbox sizes, over plain IMAP and TLS, with optional injected latency
+"""
+
+import argparse
+import statistics
+import time
+
+from email_fetcher import RealEmailFetcher
+from email_simulator import EmailSimulator
+from fake_imap_server import FakeIMAPServer, email_to_raw, make_self_signed_context, parse_latency
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def run_case(size, use_tls, fetch_count, rounds, latency, raw_emails):
+    server_context, client_context = make_self_signed_context() if use_tls else (None, None)
+    with FakeIMAPServer(ssl_context=server_context, latency=latency) as server:
+        for raw in raw_emails[:size]:
+            server.deliver(raw)
+
+        fetcher = RealEmailFetcher("bench@example.com", "pw", imap_server='localhost' if use_tls else server.host,
+                                   imap_port=server.port, use_ssl=use_tls, ssl_context=client_context)
+
+        connect_times, search_times, fetch_times = [], [], []
+        fetched = 0
+        for _ in range(rounds):
+            elapsed, connected = timed(fetcher.connect)
+            if not connected:
+                raise RuntimeError("Could not connect to the fake IMAP server")
+            connect_times.append(elapsed)
+            fetcher.mail.select('INBOX')
+
+            elapsed, uids = timed(fetcher.search_uids, 'ALL', fetch_count)
+            search_times.append(elapsed)
+
+            elapsed, emails = timed(lambda: list(fetcher.fetch_uids(uids)))
+            fetch_times.append(elapsed)
+            fetched += len(emails)
+            fetcher.disconnect()
+
+    return {
+        'connect': statistics.median(connect_times),
+        'search': statistics.median(search_times),
+        'fetch': statistics.median(fetch_times),
+        'throughput': fetched / sum(fetch_times)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='100,1000,5000', help="Comma-separated mailbox sizes")
+    parser.add_argument('--fetch', type=int, default=50, help="Newest messages fetched per round")
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--latency', action='append', metavar='COMMAND=SECONDS',
+                        help="Inject per-command server latency, e.g. FETCH=0.05 (repeatable)")
+    parser.add_argument('--no-tls', action='store_true', help="Only benchmark plain IMAP")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    latency = parse_latency(args.latency)
+    simulator = EmailSimulator()
+    raw_emails = [email_to_raw(simulator.generate_email()) for _ in range(max(sizes))]
+
+    print(f"📮 Fetching the newest {args.fetch} emails, median of {args.rounds} rounds"
+          + (f", latency {latency}" if latency else ""))
+    print(f"{'mailbox':>8} {'transport':>9} | {'connect ms':>10} {'search ms':>10} {'fetch ms':>10} | {'msg/s':>8}")
+    for use_tls in ([False] if args.no_tls else [False, True]):
+        for size in sizes:
+            result = run_case(size, use_tls, args.fetch, args.rounds, latency, raw_emails)
+            print(f"{size:>8} {'TLS' if use_tls else 'plain':>9} | {result['connect'] * 1e3:>10.1f} "
+                  f"{result['search'] * 1e3:>10.1f} {result['fetch'] * 1e3:>10.1f} | {result['throughput']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
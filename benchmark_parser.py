@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the streaming MIME parser
+Measures parse throughput (messages/second) on a synthetic import batch
+for an increasing number of worker processes
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from email.message import EmailMessage
+
+from mime_parser import parse_email_batch, parse_raw_email
+
+
+def build_message(index, attachment_size):
+    """Newsletter-style message: text, html alternative and one attachment"""
+    message = EmailMessage()
+    message['From'] = f"sender{index % 50}@example.com"
+    message['Subject'] = f"Weekly update #{index}"
+    message['Date'] = 'Mon, 04 Aug 2025 09:30:00 +0000'
+    message['Message-ID'] = f"<bench-{index}@example.com>"
+    message.set_content("Hello,\n\n" + "Here is this week's summary. " * 40)
+    message.add_alternative("<html><body>" + "<p>Here is <b>this week's</b> summary.</p>" * 40 + "</body></html>",
+                            subtype='html')
+    if attachment_size:
+        message.add_attachment(os.urandom(attachment_size), maintype='application',
+                               subtype='pdf', filename=f"report{index}.pdf")
+    return message.as_bytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=10_000)
+    parser.add_argument('--attachment-size', type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"📦 Building {args.messages} messages...")
+    batch = [(i, build_message(i, args.attachment_size)) for i in range(args.messages)]
+    size_mb = sum(len(raw) for _, raw in batch) / 1e6
+    print(f"   {size_mb:.1f} MB total")
+
+    start = time.perf_counter()
+    for number, raw in batch[:1000]:
+        parse_raw_email(raw, number)
+    baseline = 1000 / (time.perf_counter() - start)
+    print(f"\n⏱️  Inline: {baseline:,.0f} msg/s")
+
+    cpus = os.cpu_count() or 1
+    workers = 1
+    while True:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Warm the pool so process start-up is not counted
+            parse_email_batch(batch[:workers], executor=pool)
+            start = time.perf_counter()
+            parse_email_batch(batch, max_workers=workers, executor=pool)
+            elapsed = time.perf_counter() - start
+        rate = len(batch) / elapsed
+        print(f"⏱️  {workers:>2} processes: {rate:,.0f} msg/s ({rate / baseline:.1f}x inline)")
+        if workers >= cpus:
+            break
+        workers = min(cpus, workers * 2)
+
+
+if __name__ == "__main__":
+    main()
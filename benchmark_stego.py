@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark for stealth log images
+Times each stage of building a log entry (render, embed, encode, base64)
+and the way back (decode, extract) for every encoding profile, and checks
+that each profile returns the embedded payload unchanged
+"""
+
+import argparse
+import base64
+import io
+import time
+
+from PIL import Image
+
+from email_simulator import EmailSimulator
+from steganography import SteganographyModule, ENCODING_PROFILES, DEFAULT_ENCODING
+
+
+def timed(func, *args, repeat=1):
+    """Result of func(*args) and its mean run time in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args)
+    return result, (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--bit-depth', type=int, default=1)
+    parser.add_argument('--channels', default='RGBA')
+    args = parser.parse_args()
+
+    stego = SteganographyModule(bit_depth=args.bit_depth, channels=args.channels)
+    email_data = EmailSimulator().generate_email()
+    payload = {
+        'confidence': 0.87,
+        'action': 'Reply',
+        'sender': email_data['sender'],
+        'subject': email_data['subject'],
+        'timestamp': email_data['timestamp'],
+        'email_id': email_data['id']
+    }
+
+    image, render_ms = timed(stego.render_confidence_image, 0.87, email_data, 'Reply', repeat=args.repeat)
+    image, embed_ms = timed(stego.embed_data_in_image, image, payload, repeat=args.repeat)
+    print(f"🖼️  Render: {render_ms:.2f} ms")
+    print(f"🔐 Embed:  {embed_ms:.2f} ms")
+
+    print(f"\n{'profile':<15}{'encode ms':>11}{'base64 ms':>11}{'decode ms':>11}{'bytes':>9}  round-trip")
+    for profile in ENCODING_PROFILES:
+        encoded, encode_ms = timed(stego.encode_image, image, profile, repeat=args.repeat)
+        encoded_b64, b64_ms = timed(lambda raw: base64.b64encode(raw).decode(), encoded, repeat=args.repeat)
+        extracted, decode_ms = timed(
+            lambda raw: stego.extract_data_from_image(Image.open(io.BytesIO(raw))), encoded, repeat=args.repeat
+        )
+        status = "✅" if extracted == payload else "❌"
+        marker = " (default)" if profile == DEFAULT_ENCODING else ""
+        print(f"{profile:<15}{encode_ms:>11.2f}{b64_ms:>11.3f}{decode_ms:>11.2f}{len(encoded):>9,}  {status}{marker}")
+
+    total = render_ms + embed_ms
+    print(f"\n⏱️  Render + embed: {total:.2f} ms per log entry before encoding")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark for html_text.clean_text
+Compares the old regex chain with the html.parser extractor on large,
+minified marketing HTML and on plain text (which skips the parser);
+constant time per KB means linear scaling
+"""
+
+import argparse
+import re
+import time
+
+from html_text import clean_text
+
+
+def legacy_clean_text(text):
+    """The regex chain clean_text/format_email_body used before html_text"""
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'\[image:.*?\]', '', text)
+    text = re.sub(r'\[.*?\]', '', text)
+    text = re.sub(r'https?://[^\s]+', lambda m: f"🔗 {m.group(0)}", text)
+    text = re.sub(r'\n\s*\n', '\n\n', text)
+    text = re.sub(r' +', ' ', text)
+    return text.strip()
+
+
+def marketing_html(size):
+    """Minified newsletter: one long line of tables, tracking links and [brackets]"""
+    block = (
+        '<table><tr><td style="padding:0"><a href="https://track.example.com/c?u=1&amp;v=2">'
+        '<img src="https://cdn.example.com/banner.png" alt="[SALE]"></a></td>'
+        '<td>[image: logo] Save [up to] 50% on [[everything]] this [week only &amp; more'
+        ' https://shop.example.com/deals?ref=mail</td></tr></table>'
+    )
+    return (block * (size // len(block) + 1))[:size]
+
+
+def unclosed_brackets(size):
+    """Worst case for the old \\[.*?\\] pass: many '[' on one line and no ']' anywhere"""
+    block = '<td>Offer [code SAVE20 [limited [while stocks last</td>'
+    return (block * (size // len(block) + 1))[:size]
+
+
+def plain_text(size):
+    """Text/plain body: no tags or entities, so clean_text skips the parser"""
+    block = 'Hi team,\n\nThe [draft] report is at https://docs.example.com/r/42   please review.\n'
+    return (block * (size // len(block) + 1))[:size]
+
+
+def time_call(func, text, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--max-kb', type=int, default=400)
+    args = parser.parse_args()
+
+    for name, build in (("Marketing newsletter", marketing_html), ("Unclosed brackets", unclosed_brackets),
+                        ("Plain text", plain_text)):
+        print(f"\n📰 {name}")
+        print(f"{'size':>8} | {'legacy ms':>10} {'µs/KB':>8} | {'html_text ms':>12} {'µs/KB':>8}")
+        size_kb = 25
+        while size_kb <= args.max_kb:
+            text = build(size_kb * 1024)
+            legacy = time_call(legacy_clean_text, text, repeat=1)
+            # Lift the output cap so the whole document is processed
+            current = time_call(lambda t: clean_text(t, max_chars=len(t)), text)
+            print(f"{size_kb:>6}KB | {legacy * 1e3:>10.1f} {legacy * 1e6 / size_kb:>8.1f} | "
+                  f"{current * 1e3:>12.1f} {current * 1e6 / size_kb:>8.1f}")
+            size_kb *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,68 @@
 import json
-import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import random
 from collections import defaultdict, Counter
 import pickle
 import os
+import threading
+from contextlib import contextmanager
+
+from feedback_store import FeedbackStore
+
+
+class ReadWriteLock:
+    def __init__(self):
+        """
+        Many concurrent readers or a single writer
+
+        Writers are preferred: once a writer is waiting, new readers queue
+        behind it, so a steady stream of predictions cannot starve feedback.
+        """
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+    
+    @contextmanager
+    def read(self):
+        with self._condition:
+            while self._writing or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+    
+    @contextmanager
+    def write(self):
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
 
 class CognitiveAgent:
-    def __init__(self, learning_rate=0.1, discount_factor=0.95, epsilon=0.1):
+    def __init__(self, learning_rate=0.1, discount_factor=0.95, epsilon=0.1, history=None):
+        """
+        Args:
+            learning_rate: Q-learning step size
+            discount_factor: Weight of future rewards
+            epsilon: Exploration rate for epsilon-greedy action selection
+            history: FeedbackStore holding the feedback log, defaults to feedback_history.db
+        """
         self.learning_rate = learning_rate
         self.discount_factor = discount_factor
         self.epsilon = epsilon
@@ -40,8 +94,15 @@ class CognitiveAgent:
         # Available actions
         self.actions = ['Reply', 'Archive', 'Forward', 'Mark Important', 'Delete', 'Spam']
         
-        # Feedback history
-        self.feedback_history = []
+        # Feedback history, the one copy every view reads from
+        self.feedback_history = history if history is not None else FeedbackStore()
+        
+        # Bumped on every feedback; lets callers cache anything derived from it
+        self.feedback_version = 0
+        
+        # Predictions and statistics read shared state; feedback writes it.
+        # Read paths must not touch missing defaultdict keys, which would insert them.
+        self.lock = ReadWriteLock()
         
         # Load existing data if available
         self.load_memory()
@@ -65,7 +126,7 @@ class CognitiveAgent:
             'body_length': len(body),
             'has_urgent_words': any(word in subject + body for word in ['urgent', 'asap', 'important', 'deadline']),
             'has_question': '?' in subject or '?' in body,
-            'sender_frequency': self.sender_memory[sender]['total_emails'],
+            'sender_frequency': self.sender_memory[sender]['total_emails'] if sender in self.sender_memory else 0,
             'time_of_day': datetime.now().hour
         }
         
@@ -77,6 +138,10 @@ class CognitiveAgent:
     
     def predict_action(self, email_data):
         """Predict action using epsilon-greedy policy"""
+        with self.lock.read():
+            return self._predict_action(email_data)
+    
+    def _predict_action(self, email_data):
         state, keywords = self.extract_features(email_data)
         state_key = self.get_state_key(state)
         
@@ -99,7 +164,8 @@ class CognitiveAgent:
             action = random.choice(self.actions)
         else:
             # Get Q-values for current state
-            q_values = {action: self.q_table[state_key][action] for action in self.actions}
+            state_q = self.q_table.get(state_key, {})
+            q_values = {action: state_q.get(action, 0.0) for action in self.actions}
             
             # Apply sender bias if available
             if sender_bias:
@@ -181,6 +247,10 @@ class CognitiveAgent:
     
     def receive_feedback(self, email_data, predicted_action, user_feedback, correct_action=None):
         """Receive feedback and update Q-table and memory"""
+        with self.lock.write():
+            return self._receive_feedback(email_data, predicted_action, user_feedback, correct_action)
+    
+    def _receive_feedback(self, email_data, predicted_action, user_feedback, correct_action):
         state, keywords = self.extract_features(email_data)
         state_key = self.get_state_key(state)
         sender = email_data.get('sender', '').lower()
@@ -224,15 +294,27 @@ class CognitiveAgent:
             'confidence': self.calculate_confidence(state, predicted_action, keywords, 0.0)
         }
         self.feedback_history.append(feedback_entry)
+        self.feedback_version += 1
         
         # Save memory
         self.save_memory()
         
         return feedback_entry
     
+    def set_parameters(self, learning_rate, epsilon):
+        """Change learning parameters; shared by every session using this agent"""
+        with self.lock.write():
+            self.learning_rate = learning_rate
+            self.epsilon = epsilon
+    
     def get_statistics(self):
         """Get agent statistics for dashboard"""
-        total_feedback = len(self.feedback_history)
+        with self.lock.read():
+            return self._get_statistics()
+    
+    def _get_statistics(self):
+        summary = self.feedback_history.summary()
+        total_feedback = summary['total']
         if total_feedback == 0:
             return {
                 'total_feedback': 0,
@@ -244,29 +326,22 @@ class CognitiveAgent:
             }
         
         # Calculate approval rate
-        approvals = sum(1 for f in self.feedback_history if f['user_feedback'] == 'approve')
-        approval_rate = approvals / total_feedback
+        approval_rate = summary['approvals'] / total_feedback
         
         # Average confidence
-        avg_confidence = np.mean([f['confidence'] for f in self.feedback_history])
+        avg_confidence = summary['avg_confidence']
         
         # Top actions
-        action_counts = Counter([f['correct_action'] for f in self.feedback_history])
-        top_actions = action_counts.most_common(5)
+        top_actions = self.feedback_history.top('correct_action', 5)
         
         # Top senders
-        sender_counts = Counter([f['sender'] for f in self.feedback_history])
-        top_senders = sender_counts.most_common(5)
+        top_senders = self.feedback_history.top('sender', 5)
         
         # Recent performance (last 10 feedbacks)
-        recent_feedback = self.feedback_history[-10:]
-        recent_performance = []
-        for f in recent_feedback:
-            recent_performance.append({
-                'timestamp': f['timestamp'],
-                'reward': f['reward'],
-                'confidence': f['confidence']
-            })
+        recent_performance = [
+            {'timestamp': f['timestamp'], 'reward': f['reward'], 'confidence': f['confidence']}
+            for f in self.feedback_history.recent(10)
+        ]
         
         return {
             'total_feedback': total_feedback,
@@ -283,8 +358,7 @@ class CognitiveAgent:
             'q_table': dict(self.q_table),
             'sender_memory': dict(self.sender_memory),
             'keyword_memory': dict(self.keyword_memory),
-            'topic_memory': dict(self.topic_memory),
-            'feedback_history': self.feedback_history
+            'topic_memory': dict(self.topic_memory)
         }
         
         with open('agent_memory.json', 'w') as f:
@@ -319,7 +393,9 @@ class CognitiveAgent:
                 self.keyword_memory[keyword] = data
                 self.keyword_memory[keyword]['action_counts'] = Counter(data.get('action_counts', {}))
             
-            self.feedback_history = memory_data.get('feedback_history', [])
+            # Older memory files carried the feedback log; move it into the store once
+            if memory_data.get('feedback_history') and not len(self.feedback_history):
+                self.feedback_history.extend(memory_data['feedback_history'])
             
         except FileNotFoundError:
             # Initialize with empty memory
@@ -34,6 +34,7 @@ def demo_basic_functionality():
     
     print("\n2. 🤖 Agent predictions and learning...")
     
+    predictions = []
     for i, email in enumerate(emails, 1):
         # Get prediction
         prediction = agent.predict_action(email)
@@ -44,9 +45,8 @@ def demo_basic_functionality():
         print(f"   📊 Confidence: {prediction['confidence']:.3f}")
         print(f"   💡 Explanation: {prediction['explanation']}")
         
-        # Generate stealth log
-        stealth_entry = stego.generate_stealth_log(email, prediction)
-        print(f"   🕵️ Stealth Emoji: {stealth_entry['emoji_trigger']}")
+        predictions.append(prediction)
+        print(f"   🕵️ Stealth Emoji: {stego.create_emoji_trigger(prediction['action'], prediction['confidence'])}")
         
         # Simulate user feedback (alternate approve/reject)
         feedback_type = 'approve' if i % 2 == 1 else 'reject'
@@ -55,6 +55,10 @@ def demo_basic_functionality():
         print(f"   👍 User Feedback: {feedback_type.upper()}")
         print(f"   🎁 Reward: {feedback['reward']}")
     
+    # Render the stealth logs for the whole batch at once
+    stealth_entries = stego.generate_stealth_logs(emails, predictions)
+    print(f"\n   🕵️ Generated {len(stealth_entries)} stealth logs")
+    
     print("\n3. 📊 Learning progress...")
     
     stats = agent.get_statistics()
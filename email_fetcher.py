@@ -1,258 +1,475 @@
-import imaplib
 import email
-from email.header import decode_header
+import imaplib
 import os
-from datetime import datetime
 import re
-from typing import List, Dict, Any
+import ssl
+from typing import List, Dict, Any, Iterator, Callable, Container, Tuple, Union
 import base64
+import queue
+import threading
+import time
+
+import mime_parser
+from email_query import EmailQuery
+from resilience import TRANSIENT_ERRORS, CircuitBreaker, CircuitOpenError, FetchMetrics, backoff_delay
+
+_UID_RE = re.compile(rb'UID (\d+)')
+_GM_MSGID_RE = re.compile(rb'X-GM-MSGID (\d+)')
 
 class RealEmailFetcher:
-    def __init__(self, email_address: str, password: str = None):
+    def __init__(self, email_address: str, password: str = None,
+                 imap_server: str = "imap.gmail.com", imap_port: int = 993, use_ssl: bool = True,
+                 ssl_context: ssl.SSLContext = None, connect_timeout: float = 10.0, read_timeout: float = 30.0,
+                 max_retries: int = 2, backoff_base: float = 0.5, backoff_max: float = 4.0,
+                 breaker: CircuitBreaker = None, metrics: FetchMetrics = None):
         """
         Initialize email fetcher for Gmail
         
+        Every IMAP operation is bounded: it takes at most
+        (max_retries + 1) * timeout plus backoff_max per retry, and once the
+        circuit breaker opens, calls fail immediately.
+        
         Args:
             email_address: Gmail address
             password: App password (not regular password)
+            imap_server: IMAP host, Gmail by default
+            imap_port: IMAP port
+            use_ssl: Connect over implicit TLS (IMAP4_SSL) instead of plain IMAP4
+            ssl_context: Custom TLS context, e.g. one trusting a self-signed test server
+            connect_timeout: Seconds allowed for TCP/TLS connect and login
+            read_timeout: Seconds to wait for any server response afterwards
+            max_retries: Retries for transient errors (timeouts, dropped connections)
+            backoff_base: First retry waits up to this many seconds, doubling each time
+            backoff_max: Cap on a single backoff wait
+            breaker: Circuit breaker, shared by copies of this fetcher
+            metrics: Call counts, retries and latencies (see FetchMetrics.as_dict)
         """
         self.email_address = email_address
         self.password = password or os.getenv('GMAIL_APP_PASSWORD')
-        self.imap_server = "imap.gmail.com"
-        self.imap_port = 993
+        self.imap_server = imap_server
+        self.imap_port = imap_port
+        self.use_ssl = use_ssl
+        self.ssl_context = ssl_context
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = metrics or FetchMetrics()
+        self.parse_executor = None
+        self.selected_folder = None
         
     def connect(self):
         """Connect to Gmail IMAP server"""
         try:
-            self.mail = imaplib.IMAP4_SSL(self.imap_server, self.imap_port)
-            self.mail.login(self.email_address, self.password)
+            self._run('connect', self._open, reconnect=False)
             return True
+        except CircuitOpenError as e:
+            print(f"⛔ {e}")
+            return False
         except Exception as e:
             print(f"❌ Connection failed: {e}")
             return False
     
     def disconnect(self):
         """Disconnect from Gmail"""
-        if hasattr(self, 'mail'):
-            self.mail.logout()
+        mail = self.__dict__.pop('mail', None)
+        if mail is not None:
+            mail.logout()
     
-    def clean_text(self, text: str) -> str:
-        """Clean email text content"""
-        if not text:
-            return ""
-        
-        # Decode if needed
-        if isinstance(text, bytes):
-            text = text.decode('utf-8', errors='ignore')
-        
-        # Remove HTML tags
-        text = re.sub(r'<[^>]+>', '', text)
-        
-        # Remove common email artifacts
-        text = re.sub(r'\[image:.*?\]', '', text)  # Remove image placeholders
-        text = re.sub(r'\[.*?\]', '', text)  # Remove other brackets
-        
-        # Clean up URLs (make them readable)
-        text = re.sub(r'https?://[^\s]+', lambda m: f"🔗 {m.group(0)}", text)
-        
-        # Clean up excessive whitespace but preserve line breaks
-        text = re.sub(r'\n\s*\n', '\n\n', text)  # Remove excessive line breaks
-        text = re.sub(r' +', ' ', text)  # Remove multiple spaces
+    def _open(self):
+        if self.use_ssl:
+            mail = imaplib.IMAP4_SSL(self.imap_server, self.imap_port, ssl_context=self.ssl_context,
+                                     timeout=self.connect_timeout)
+        else:
+            mail = imaplib.IMAP4(self.imap_server, self.imap_port, timeout=self.connect_timeout)
+        try:
+            mail.login(self.email_address, self.password)
+        except Exception:
+            mail.shutdown()
+            raise
+        mail.sock.settimeout(self.read_timeout)
+        self.mail = mail
+        self.selected_folder = None
+    
+    def _drop(self):
+        """Close a broken connection without waiting for LOGOUT"""
+        mail = self.__dict__.pop('mail', None)
+        if mail is not None:
+            try:
+                mail.shutdown()
+            except OSError:
+                pass
+    
+    def _select(self, folder: str):
+        typ, data = self.mail.select(folder)
+        if typ != 'OK':
+            raise imaplib.IMAP4.error(f"Cannot select {folder}: {data}")
+        self.selected_folder = folder
+    
+    def select(self, folder: str = 'INBOX'):
+        """Open a folder; it is reselected automatically after a reconnect"""
+        self._run('select', self._select, folder)
+    
+    def _run(self, operation: str, func: Callable, *args, reconnect: bool = True):
+        """
+        Call func with retries, circuit breaking and metrics
         
-        # Clean up the text
-        text = text.strip()
+        Transient errors are retried after a jittered backoff, on a fresh
+        connection (and the same folder) when reconnect is set.
+        """
+        if not self.breaker.allow():
+            self.metrics.record_rejection()
+            raise CircuitOpenError(f"{self.imap_server} is failing; not retrying for now")
         
-        return text
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                result = func(*args)
+            except TRANSIENT_ERRORS as e:
+                self.metrics.record(operation, time.perf_counter() - started, failed=True)
+                if attempt >= self.max_retries:
+                    self.breaker.record_failure()
+                    self._drop()
+                    raise
+                attempt += 1
+                self.metrics.record_retry(operation)
+                print(f"⚠️ {operation} failed ({e}), retry {attempt}/{self.max_retries}")
+                time.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+                if reconnect:
+                    folder = self.selected_folder
+                    self._drop()
+                    try:
+                        self._open()
+                        if folder:
+                            self._select(folder)
+                    except TRANSIENT_ERRORS:
+                        # Counted as a failed attempt when func runs on the dead connection
+                        pass
+                continue
+            except imaplib.IMAP4.error:
+                # A NO/BAD reply (e.g. rejected LOGIN): the server is up, so the circuit may close
+                self.metrics.record(operation, time.perf_counter() - started, failed=True)
+                self.breaker.record_success()
+                raise
+            except Exception:
+                # Not the server's fault; just free the half-open trial slot
+                self.metrics.record(operation, time.perf_counter() - started, failed=True)
+                self.breaker.release()
+                raise
+            self.metrics.record(operation, time.perf_counter() - started)
+            self.breaker.record_success()
+            return result
+    
+    def clean_text(self, text: str) -> str:
+        """Clean email text content"""
+        return mime_parser.clean_text(text)
     
     def get_email_body(self, msg) -> str:
         """Extract email body from message"""
-        body = ""
+        return mime_parser.message_body(msg)
+    
+    def get_attachments(self, msg) -> List[Dict[str, Any]]:
+        """Extract attachment information"""
+        return mime_parser.message_attachments(msg)
+    
+    def parse_message(self, num, raw_email: bytes) -> Dict[str, Any]:
+        """Build the email dict for one raw RFC822 message"""
+        return mime_parser.parse_raw_email(raw_email, num)
+    
+    def _uid(self, command: str, *args):
+        typ, data = self.mail.uid(command, *args)
+        if typ != 'OK':
+            raise imaplib.IMAP4.error(f"UID {command} failed: {data}")
+        return data
+    
+    def search_uids(self, query: Union[str, EmailQuery] = 'ALL', limit: int = 10) -> List[bytes]:
+        """
+        Run the query on the selected folder and return the UIDs of the newest matches
         
-        if msg.is_multipart():
-            for part in msg.walk():
-                content_type = part.get_content_type()
-                content_disposition = str(part.get("Content-Disposition"))
-                
-                if content_type == "text/plain" and "attachment" not in content_disposition:
-                    try:
-                        body = part.get_payload(decode=True).decode()
-                        break
-                    except:
-                        continue
+        Uses UID SORT (REVERSE DATE) when the server supports it so only the
+        wanted UIDs come back ordered; otherwise falls back to UID SEARCH,
+        whose results are in arrival order. UIDs are returned oldest first.
+        """
+        capabilities = self.mail.capabilities
+        if isinstance(query, EmailQuery):
+            if query.needs_utf8():
+                if 'UTF8=ACCEPT' not in capabilities:
+                    raise ValueError("Server cannot search non-ASCII text (no UTF8=ACCEPT)")
+                self.mail.enable('UTF8=ACCEPT')
+            criteria = query.to_criteria(gmail='X-GM-EXT-1' in capabilities)
         else:
-            try:
-                body = msg.get_payload(decode=True).decode()
-            except:
-                body = str(msg.get_payload())
+            criteria = [query]
         
-        return self.clean_text(body)
+        if 'SORT' in capabilities:
+            data = self._run('search', self._uid, 'SORT', '(REVERSE DATE)', 'UTF-8', *criteria)
+            uids = data[0].split()[:limit]
+            uids.reverse()
+        else:
+            data = self._run('search', self._uid, 'SEARCH', *criteria)
+            uids = data[0].split()[-limit:]
+        
+        return uids
     
-    def get_attachments(self, msg) -> List[Dict[str, Any]]:
-        """Extract attachment information"""
-        attachments = []
+    def fetch_uids(self, uids: List[bytes], batch_size: int = 10) -> Iterator[Dict[str, Any]]:
+        """
+        Fetch and parse messages by UID, batching several per FETCH round trip
         
-        if msg.is_multipart():
-            for part in msg.walk():
-                if part.get_content_maintype() == 'multipart':
-                    continue
-                if part.get('Content-Disposition') is None:
+        Parsing runs in self.parse_executor when one is set, otherwise in
+        mime_parser.shared_executor() once a fetch has PARALLEL_THRESHOLD
+        messages or more; smaller fetches are parsed inline.
+        """
+        executor = self.parse_executor
+        if executor is None and len(uids) >= mime_parser.PARALLEL_THRESHOLD:
+            executor = mime_parser.shared_executor()
+        if executor is not None:
+            # Fetch enough per round trip to keep the pool busy
+            batch_size = max(batch_size, mime_parser.PARALLEL_THRESHOLD)
+        
+        for start in range(0, len(uids), batch_size):
+            batch = uids[start:start + batch_size]
+            msg_data = self._run('fetch', self._uid, 'FETCH', b','.join(batch), '(RFC822)')
+            
+            raw_by_uid = {}
+            for item in msg_data:
+                if isinstance(item, tuple):
+                    match = _UID_RE.search(item[0])
+                    if match:
+                        raw_by_uid[match.group(1)] = item[1]
+            
+            raw_emails = [(uid, raw_by_uid[uid]) for uid in batch if uid in raw_by_uid]
+            parsed = mime_parser.parse_email_batch(raw_emails, executor=executor)
+            for (uid, _), email_data in zip(raw_emails, parsed):
+                if email_data is None:
+                    self.metrics.record_parse_failure()
+                else:
+                    email_data['uid'] = uid.decode()
+                    yield email_data
+    
+    def fetch_message_keys(self, uids: List[bytes], folder: str = 'INBOX', batch_size: int = 200) -> Dict[bytes, str]:
+        """
+        Map UIDs to stable message keys without downloading bodies
+        
+        Uses Gmail's X-GM-MSGID when the server advertises X-GM-EXT-1 and the
+        Message-ID header otherwise; messages without one are keyed by folder and UID.
+        """
+        gmail = 'X-GM-EXT-1' in self.mail.capabilities
+        items = '(X-GM-MSGID)' if gmail else '(BODY.PEEK[HEADER.FIELDS (MESSAGE-ID)])'
+        keys = {}
+        
+        for start in range(0, len(uids), batch_size):
+            batch = uids[start:start + batch_size]
+            msg_data = self._run('fetch keys', self._uid, 'FETCH', b','.join(batch), items)
+            for item in msg_data:
+                response = item[0] if isinstance(item, tuple) else item
+                match = _UID_RE.search(response) if isinstance(response, bytes) else None
+                if not match:
                     continue
-                
-                filename = part.get_filename()
-                if filename:
-                    attachments.append({
-                        'name': filename,
-                        'size': len(part.get_payload()),
-                        'type': part.get_content_type()
-                    })
-        
-        return attachments
+                if gmail:
+                    gm_match = _GM_MSGID_RE.search(response)
+                    key = f"gm:{gm_match.group(1).decode()}" if gm_match else None
+                else:
+                    key = email.message_from_bytes(item[1])['message-id'] if isinstance(item, tuple) else None
+                if key:
+                    keys[match.group(1)] = key.strip()
+        
+        return {uid: keys.get(uid) or f"{folder}:{uid.decode()}" for uid in uids}
     
-    def fetch_recent_emails(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Fetch recent emails from inbox"""
+    def fetch_new_emails(self, query: Union[str, EmailQuery] = 'ALL', limit: int = 10, folder: str = 'INBOX',
+                         known: Container[str] = (),
+                         on_email: Callable[[Dict[str, Any]], None] = None) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        Fetch only the matches whose message key is not already known
+        
+        Returns the keys of all matches (oldest first) and the parsed emails
+        for the new ones, each tagged with its 'message_key'. on_email, if
+        given, is called with each new email as soon as it is parsed.
+        """
         if not self.connect():
-            return []
+            return [], []
         
         try:
-            # Select inbox
-            self.mail.select('INBOX')
-            
-            # Search for recent emails
-            _, message_numbers = self.mail.search(None, 'ALL')
-            
-            # Get the latest emails
-            email_list = message_numbers[0].split()
-            recent_emails = email_list[-limit:] if len(email_list) > limit else email_list
-            
-            emails = []
-            
-            for num in recent_emails:
-                try:
-                    _, msg_data = self.mail.fetch(num, '(RFC822)')
-                    email_body = msg_data[0][1]
-                    msg = email.message_from_bytes(email_body)
-                    
-                    # Extract email details
-                    subject = decode_header(msg["subject"])[0][0]
-                    if isinstance(subject, bytes):
-                        subject = subject.decode()
-                    
-                    sender = decode_header(msg["from"])[0][0]
-                    if isinstance(sender, bytes):
-                        sender = sender.decode()
-                    
-                    date = msg["date"]
-                    if date:
-                        try:
-                            parsed_date = email.utils.parsedate_to_datetime(date)
-                        except:
-                            parsed_date = datetime.now()
-                    else:
-                        parsed_date = datetime.now()
-                    
-                    # Determine priority based on subject and sender
-                    priority = "medium"
-                    if any(word in subject.lower() for word in ["urgent", "asap", "important", "critical"]):
-                        priority = "high"
-                    elif any(word in subject.lower() for word in ["newsletter", "update", "weekly"]):
-                        priority = "low"
-                    
-                    email_data = {
-                        'subject': subject or "No Subject",
-                        'sender': sender or "Unknown Sender",
-                        'timestamp': parsed_date.isoformat(),
-                        'priority': priority,
-                        'body': self.get_email_body(msg),
-                        'attachments': self.get_attachments(msg),
-                        'message_id': msg["message-id"] or f"msg_{num.decode()}",
-                        'real_email': True
-                    }
-                    
-                    emails.append(email_data)
-                    
-                except Exception as e:
-                    print(f"❌ Error processing email {num}: {e}")
-                    continue
+            self.select(folder)
+            uids = self.search_uids(query, limit)
+            keys = self.fetch_message_keys(uids, folder)
+            new_uids = [uid for uid in uids if keys[uid] not in known]
             
-            return emails
+            new_emails = []
+            for email_data in self.fetch_uids(new_uids):
+                email_data['message_key'] = keys[email_data['uid'].encode()]
+                new_emails.append(email_data)
+                if on_email is not None:
+                    on_email(email_data)
+            return [keys[uid] for uid in uids], new_emails
             
         except Exception as e:
             print(f"❌ Error fetching emails: {e}")
-            return []
+            return [], []
         finally:
             self.disconnect()
     
-    def fetch_emails_by_sender(self, sender_email: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Fetch emails from a specific sender"""
+    def iter_emails(self, query: Union[str, EmailQuery] = 'ALL', limit: int = 10, folder: str = 'INBOX') -> Iterator[Dict[str, Any]]:
+        """Yield parsed emails matching the query one batch at a time as they are fetched"""
         if not self.connect():
-            return []
+            return
         
         try:
-            self.mail.select('INBOX')
-            
-            # Search for emails from specific sender
-            search_criteria = f'FROM "{sender_email}"'
-            _, message_numbers = self.mail.search(None, search_criteria)
-            
-            email_list = message_numbers[0].split()
-            recent_emails = email_list[-limit:] if len(email_list) > limit else email_list
-            
-            emails = []
+            self.select(folder)
+            yield from self.fetch_uids(self.search_uids(query, limit))
             
-            for num in recent_emails:
+        except Exception as e:
+            print(f"❌ Error fetching emails: {e}")
+        finally:
+            self.disconnect()
+    
+    def search_emails(self, query: EmailQuery, limit: int = 10, folder: str = 'INBOX') -> List[Dict[str, Any]]:
+        """Fetch the newest emails matching a server-side query"""
+        return list(self.iter_emails(query, limit, folder))
+    
+    def fetch_recent_emails(self, limit: int = 10, folder: str = 'INBOX') -> List[Dict[str, Any]]:
+        """Fetch recent emails from inbox"""
+        return list(self.iter_emails('ALL', limit, folder))
+    
+    def fetch_emails_by_sender(self, sender_email: str, limit: int = 10, folder: str = 'INBOX') -> List[Dict[str, Any]]:
+        """Fetch emails from a specific sender"""
+        return self.search_emails(EmailQuery(sender=sender_email), limit, folder)
+
+    def idle(self, timeout: float = 29 * 60, stop_event: threading.Event = None) -> bool:
+        """
+        Hold one IDLE command on the selected folder
+        
+        Returns True as soon as the server announces new mail, False when the
+        timeout passes or stop_event is set first.
+        """
+        tag = self.mail._new_tag()
+        self.mail.send(tag + b' IDLE\r\n')
+        if not self.mail.readline().startswith(b'+'):
+            raise imaplib.IMAP4.error("Server refused IDLE")
+        # The server stays silent while idling; only give up well after DONE is due
+        self.mail.sock.settimeout(timeout + self.read_timeout)
+        
+        stop_event = stop_event or threading.Event()
+        done_sent = threading.Event()
+        send_lock = threading.Lock()
+        
+        def send_done():
+            with send_lock:
+                if not done_sent.is_set():
+                    done_sent.set()
+                    self.mail.send(b'DONE\r\n')
+        
+        def end_idle_when_due():
+            # DONE is sent from here so the reading thread can block in readline
+            deadline = time.monotonic() + timeout
+            while not done_sent.is_set() and time.monotonic() < deadline:
+                if stop_event.wait(0.2):
+                    break
+            send_done()
+        
+        helper = threading.Thread(target=end_idle_when_due, daemon=True)
+        helper.start()
+        
+        has_new_mail = False
+        try:
+            while True:
+                line = self.mail.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort("Connection closed during IDLE")
+                if line.startswith(tag):
+                    if not line[len(tag):].lstrip().startswith(b'OK'):
+                        raise imaplib.IMAP4.error(line.decode(errors='replace'))
+                    break
+                if line.rstrip().upper().endswith(b'EXISTS'):
+                    has_new_mail = True
+                    send_done()
+        finally:
+            send_done()
+            helper.join()
+            self.mail.tagged_commands.pop(tag, None)
+            self.mail.sock.settimeout(self.read_timeout)
+        
+        return has_new_mail
+    
+    def watch(self, agent, folder: str = 'INBOX', queue_size: int = 100, idle_timeout: float = 29 * 60,
+              stop_event: threading.Event = None, on_prediction: Callable = None) -> int:
+        """
+        Push new mail into a prediction queue as the server announces it
+        
+        Holds an IMAP IDLE session on the folder. Each new message is fetched
+        right away and put on a bounded queue; a worker thread runs
+        agent.predict_action on it and logs the result. Blocks until
+        stop_event is set and returns the number of emails predicted.
+        
+        Args:
+            agent: CognitiveAgent used for predictions
+            folder: Mailbox to watch
+            queue_size: Maximum emails waiting for prediction before fetching blocks
+            idle_timeout: Seconds before IDLE is re-issued (servers drop it after ~30 min)
+            stop_event: Set it to end the watch
+            on_prediction: Optional callback(email_data, prediction) run by the worker
+        """
+        stop_event = stop_event or threading.Event()
+        email_queue = queue.Queue(maxsize=queue_size)
+        processed = [0]
+        
+        def predict_worker():
+            while True:
+                email_data = email_queue.get()
+                if email_data is None:
+                    break
                 try:
-                    _, msg_data = self.mail.fetch(num, '(RFC822)')
-                    email_body = msg_data[0][1]
-                    msg = email.message_from_bytes(email_body)
-                    
-                    # Extract email details (same as above)
-                    subject = decode_header(msg["subject"])[0][0]
-                    if isinstance(subject, bytes):
-                        subject = subject.decode()
-                    
-                    sender = decode_header(msg["from"])[0][0]
-                    if isinstance(sender, bytes):
-                        sender = sender.decode()
-                    
-                    date = msg["date"]
-                    if date:
-                        try:
-                            parsed_date = email.utils.parsedate_to_datetime(date)
-                        except:
-                            parsed_date = datetime.now()
-                    else:
-                        parsed_date = datetime.now()
-                    
-                    priority = "medium"
-                    if any(word in subject.lower() for word in ["urgent", "asap", "important", "critical"]):
-                        priority = "high"
-                    elif any(word in subject.lower() for word in ["newsletter", "update", "weekly"]):
-                        priority = "low"
-                    
-                    email_data = {
-                        'subject': subject or "No Subject",
-                        'sender': sender or "Unknown Sender",
-                        'timestamp': parsed_date.isoformat(),
-                        'priority': priority,
-                        'body': self.get_email_body(msg),
-                        'attachments': self.get_attachments(msg),
-                        'message_id': msg["message-id"] or f"msg_{num.decode()}",
-                        'real_email': True
-                    }
-                    
-                    emails.append(email_data)
-                    
+                    prediction = agent.predict_action(email_data)
+                    processed[0] += 1
+                    print(f"📨 {email_data['subject'][:50]} -> {prediction['action']} "
+                          f"(confidence: {prediction['confidence']:.3f})")
+                    if on_prediction:
+                        on_prediction(email_data, prediction)
                 except Exception as e:
-                    print(f"❌ Error processing email {num}: {e}")
-                    continue
-            
-            return emails
+                    print(f"❌ Error predicting email {email_data.get('message_id')}: {e}")
+                finally:
+                    email_queue.task_done()
+        
+        worker = threading.Thread(target=predict_worker, daemon=True)
+        worker.start()
+        
+        if not self.connect():
+            email_queue.put(None)
+            worker.join()
+            return 0
+        
+        try:
+            self.select(folder)
+            _, data = self.mail.uid('SEARCH', None, 'ALL')
+            uids = data[0].split()
+            last_uid = int(uids[-1]) if uids else 0
             
+            while not stop_event.is_set():
+                if not self.idle(idle_timeout, stop_event):
+                    continue
+                
+                # UID n:* always matches the newest message, even an old one
+                _, data = self.mail.uid('SEARCH', None, f'UID {last_uid + 1}:*')
+                for uid in data[0].split():
+                    if int(uid) <= last_uid:
+                        continue
+                    last_uid = int(uid)
+                    try:
+                        _, msg_data = self.mail.uid('FETCH', uid, '(RFC822)')
+                        email_data = self.parse_message(uid, msg_data[0][1])
+                    except Exception as e:
+                        print(f"❌ Error processing email {uid}: {e}")
+                        continue
+                    email_queue.put(email_data)
         except Exception as e:
-            print(f"❌ Error fetching emails: {e}")
-            return []
+            print(f"❌ Error watching {folder}: {e}")
         finally:
+            email_queue.put(None)
+            worker.join()
             self.disconnect()
+        
+        return processed[0]
 
 # Demo function to test email fetching
 def demo_email_fetching():
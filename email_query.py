@@ -0,0 +1,83 @@
+from datetime import date, datetime
+from typing import List, Optional, Union
+
+# IMAP dates are always English, whatever the process locale is
+_MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def imap_date(value: Union[date, datetime, str]) -> str:
+    """Format a date as IMAP's dd-Mon-yyyy"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return f"{value.day:02d}-{_MONTHS[value.month - 1]}-{value.year}"
+
+
+def imap_quote(value: str) -> str:
+    """Quote a search string argument"""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+class EmailQuery:
+    def __init__(self, sender: str = None, subject: str = None,
+                 since: Union[date, datetime, str] = None, before: Union[date, datetime, str] = None,
+                 unseen: Optional[bool] = None, flagged: Optional[bool] = None,
+                 larger: int = None, smaller: int = None, gmail_raw: str = None):
+        """
+        Server-side search filter, translated into a single IMAP SEARCH
+
+        Args:
+            sender: Substring of the From header
+            subject: Substring of the Subject header
+            since: Only messages received on or after this date
+            before: Only messages received before this date
+            unseen: True for unread only, False for read only
+            flagged: True for starred only, False for unstarred only
+            larger: Minimum size in bytes
+            smaller: Maximum size in bytes
+            gmail_raw: Gmail search syntax (e.g. "category:updates has:attachment"), needs X-GM-EXT-1
+        """
+        self.sender = sender
+        self.subject = subject
+        self.since = since
+        self.before = before
+        self.unseen = unseen
+        self.flagged = flagged
+        self.larger = larger
+        self.smaller = smaller
+        self.gmail_raw = gmail_raw
+
+    def to_criteria(self, gmail: bool = False) -> List[str]:
+        """Search keys for imaplib, ANDed together by the server"""
+        criteria = []
+        if self.sender:
+            criteria += ['FROM', imap_quote(self.sender)]
+        if self.subject:
+            criteria += ['SUBJECT', imap_quote(self.subject)]
+        if self.since:
+            criteria += ['SINCE', imap_date(self.since)]
+        if self.before:
+            criteria += ['BEFORE', imap_date(self.before)]
+        if self.unseen is not None:
+            criteria.append('UNSEEN' if self.unseen else 'SEEN')
+        if self.flagged is not None:
+            criteria.append('FLAGGED' if self.flagged else 'UNFLAGGED')
+        if self.larger is not None:
+            criteria += ['LARGER', str(int(self.larger))]
+        if self.smaller is not None:
+            criteria += ['SMALLER', str(int(self.smaller))]
+        if self.gmail_raw:
+            if not gmail:
+                raise ValueError("X-GM-RAW searches need a Gmail server (X-GM-EXT-1)")
+            criteria += ['X-GM-RAW', imap_quote(self.gmail_raw)]
+        return criteria or ['ALL']
+
+    def needs_utf8(self) -> bool:
+        """Whether any string argument falls outside ASCII"""
+        return any(
+            value and not value.isascii()
+            for value in (self.sender, self.subject, self.gmail_raw)
+        )
+
+    def __repr__(self):
+        fields = ', '.join(f"{key}={value!r}" for key, value in vars(self).items() if value is not None)
+        return f"EmailQuery({fields})"
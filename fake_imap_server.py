@@ -0,0 +1,637 @@
+#!/usr/bin/env python3
+"""
+Minimal in-process IMAP4rev1 server for exercising RealEmailFetcher
+without a live Gmail account.
+
+Run it standalone to point a fetcher (or the benchmark) at localhost:
+    python fake_imap_server.py --port 1143 --seed 500 --tls --latency FETCH=0.05
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import select
+import socket
+import socketserver
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from email.message import EmailMessage
+from email.parser import BytesHeaderParser
+from email.utils import format_datetime, make_msgid, parsedate_to_datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+CAPABILITIES = "IMAP4rev1 IDLE UIDPLUS SORT"
+GMAIL_CAPABILITIES = CAPABILITIES + " X-GM-EXT-1"
+
+_LITERAL_RE = re.compile(rb'\{(\d+)\}$')
+
+
+class FakeMailbox:
+    def __init__(self):
+        """Messages of one folder, in arrival order"""
+        self.messages = []
+        self.next_uid = 1
+
+    def append(self, raw: bytes, flags=(), labels=()) -> Dict[str, Any]:
+        if b'\r\n' not in raw:
+            raw = raw.replace(b'\n', b'\r\n')
+        headers = BytesHeaderParser().parsebytes(raw)
+        try:
+            sent = parsedate_to_datetime(headers['date'])
+        except (TypeError, ValueError):
+            sent = None
+        if sent is None:
+            sent = datetime.now(timezone.utc)
+        elif sent.tzinfo is None:
+            sent = sent.replace(tzinfo=timezone.utc)
+        message = {
+            'uid': self.next_uid,
+            'raw': raw,
+            'flags': set(flags),
+            'labels': {label.lower() for label in labels},
+            'headers': headers,
+            # Like Gmail, the same message delivered to two labels keeps one id
+            'gm_msgid': int.from_bytes(hashlib.sha1(raw).digest()[:8], 'big') >> 1,
+            # Treat the Date header as the arrival time so seeded mailboxes
+            # answer SINCE/BEFORE the way a real import would
+            'internaldate': sent
+        }
+        self.next_uid += 1
+        self.messages.append(message)
+        return message
+
+
+class IMAPHandler(socketserver.BaseRequestHandler):
+    """One client connection; commands are handled strictly in order"""
+
+    def setup(self):
+        self.buffer = b''
+        self.selected = None
+        self.authenticated = False
+        self.server.pause('CONNECT')
+        # Responses go out line by line; without this Nagle adds ~40 ms per command
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.server.ssl_context is not None:
+            self.request = self.server.ssl_context.wrap_socket(self.request, server_side=True)
+
+    # ---- low level I/O -------------------------------------------------
+
+    def send(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        self.request.sendall(data)
+
+    def send_line(self, line):
+        self.send((line.encode() if isinstance(line, str) else line) + b'\r\n')
+
+    def _fill(self, timeout=None) -> bool:
+        # TLS may already hold decrypted bytes that select() cannot see
+        pending = getattr(self.request, 'pending', None)
+        if timeout is not None and not (pending and pending()):
+            readable, _, _ = select.select([self.request], [], [], timeout)
+            if not readable:
+                return True
+        chunk = self.request.recv(65536)
+        if not chunk:
+            return False
+        self.buffer += chunk
+        return True
+
+    def read_line(self, timeout=None) -> Optional[bytes]:
+        """Return one CRLF-terminated line, b'' on timeout or None on disconnect"""
+        while b'\r\n' not in self.buffer:
+            before = len(self.buffer)
+            if not self._fill(timeout):
+                return None
+            if timeout is not None and len(self.buffer) == before:
+                return b''
+        line, self.buffer = self.buffer.split(b'\r\n', 1)
+        return line
+
+    def read_command(self) -> Optional[bytes]:
+        """Read a command line, splicing in any synchronizing literals"""
+        line = self.read_line()
+        if line is None:
+            return None
+        match = _LITERAL_RE.search(line)
+        while match:
+            size = int(match.group(1))
+            self.send_line('+ Ready for literal data')
+            while len(self.buffer) < size:
+                if not self._fill():
+                    return None
+            literal, self.buffer = self.buffer[:size], self.buffer[size:]
+            rest = self.read_line()
+            if rest is None:
+                return None
+            line = line[:match.start()] + b'"' + literal.replace(b'\\', b'\\\\').replace(b'"', b'\\"') + b'"' + rest
+            match = _LITERAL_RE.search(line)
+        return line
+
+    # ---- dispatch --------------------------------------------------------
+
+    def handle(self):
+        self.send_line('* OK Fake IMAP4rev1 server ready')
+        while True:
+            line = self.read_command()
+            if line is None:
+                return
+            parts = line.decode('utf-8', errors='replace').split(' ', 2)
+            if len(parts) < 2:
+                self.send_line('* BAD Malformed command')
+                continue
+            tag, command = parts[0], parts[1].upper()
+            args = parts[2] if len(parts) > 2 else ''
+            if command == 'UID':
+                self.server.pause('UID ' + args.split(' ', 1)[0].upper())
+            else:
+                self.server.pause(command)
+            handler = getattr(self, f'cmd_{command.replace(".", "_")}', None)
+            if handler is None:
+                self.send_line(f'{tag} BAD Unknown command {command}')
+                continue
+            try:
+                if handler(tag, args) is False:
+                    return
+            except (ConnectionError, ssl.SSLError):
+                # Client gave up, e.g. after a read timeout
+                return
+            except Exception as e:
+                self.send_line(f'{tag} BAD {e}')
+
+    def cmd_CAPABILITY(self, tag, args):
+        self.send_line(f'* CAPABILITY {self.server.capabilities}')
+        self.send_line(f'{tag} OK CAPABILITY completed')
+
+    def cmd_NOOP(self, tag, args):
+        self.send_line(f'{tag} OK NOOP completed')
+
+    def cmd_LOGIN(self, tag, args):
+        user, password = [unquote(token) for token in tokenize(args)[:2]]
+        if self.server.credentials and self.server.credentials != (user, password):
+            self.send_line(f'{tag} NO [AUTHENTICATIONFAILED] Invalid credentials')
+            return
+        self.authenticated = True
+        self.send_line(f'{tag} OK LOGIN completed')
+
+    def cmd_LOGOUT(self, tag, args):
+        self.send_line('* BYE Logging out')
+        self.send_line(f'{tag} OK LOGOUT completed')
+        return False
+
+    def cmd_SELECT(self, tag, args):
+        name = unquote(args.strip())
+        mailbox = self.server.mailboxes.get(name)
+        if mailbox is None:
+            self.send_line(f'{tag} NO Mailbox does not exist')
+            return
+        self.selected = name
+        self.send_line(f'* {len(mailbox.messages)} EXISTS')
+        self.send_line('* 0 RECENT')
+        self.send_line(f'* OK [UIDNEXT {mailbox.next_uid}] Predicted next UID')
+        self.send_line('* OK [UIDVALIDITY 1] UIDs valid')
+        self.send_line(f'{tag} OK [READ-WRITE] SELECT completed')
+
+    cmd_EXAMINE = cmd_SELECT
+
+    def cmd_CLOSE(self, tag, args):
+        self.selected = None
+        self.send_line(f'{tag} OK CLOSE completed')
+
+    def cmd_SEARCH(self, tag, args, uid=False):
+        messages = self.server.mailboxes[self.selected].messages
+        criteria = tokenize(args)
+        if criteria and criteria[0].upper() == 'CHARSET':
+            criteria = criteria[2:]
+        last_uid = messages[-1]['uid'] if messages else 0
+        hits = [
+            (message['uid'] if uid else seq)
+            for seq, message in enumerate(messages, 1)
+            if matches(message, seq, criteria, last_uid, len(messages))
+        ]
+        self.send_line('* SEARCH' + ''.join(f' {hit}' for hit in hits))
+        self.send_line(f'{tag} OK SEARCH completed')
+
+    def cmd_FETCH(self, tag, args, uid=False):
+        messages = self.server.mailboxes[self.selected].messages
+        message_set, items = args.split(' ', 1)
+        items = tokenize(items.strip()[1:-1] if items.strip().startswith('(') else items)
+        if uid and 'UID' not in [item.upper() for item in items]:
+            items = ['UID'] + items
+        for seq, message in selected_messages(messages, message_set, uid):
+            self.send(b'* %d FETCH (' % seq + fetch_response(message, items) + b')\r\n')
+        self.send_line(f'{tag} OK FETCH completed')
+
+    def cmd_SORT(self, tag, args, uid=False):
+        messages = self.server.mailboxes[self.selected].messages
+        tokens = tokenize(args)
+        program, criteria = tokens[0].strip('()').upper().split(), tokens[2:]
+        last_uid = messages[-1]['uid'] if messages else 0
+        hits = [
+            (seq, message) for seq, message in enumerate(messages, 1)
+            if matches(message, seq, criteria, last_uid, len(messages))
+        ]
+        # Apply sort keys from least to most significant; the sort is stable
+        keys = []
+        reverse = False
+        for key in program:
+            if key == 'REVERSE':
+                reverse = True
+                continue
+            keys.append((key, reverse))
+            reverse = False
+        for key, reverse in reversed(keys):
+            if key == 'DATE':
+                hits.sort(key=lambda hit: hit[1]['internaldate'], reverse=reverse)
+            elif key == 'ARRIVAL':
+                hits.sort(key=lambda hit: hit[1]['uid'], reverse=reverse)
+            elif key in ('FROM', 'SUBJECT'):
+                hits.sort(key=lambda hit: str(hit[1]['headers'].get(key, '')).lower(), reverse=reverse)
+            else:
+                raise ValueError(f'Unsupported sort key {key}')
+        self.send_line('* SORT' + ''.join(f' {message["uid"] if uid else seq}' for seq, message in hits))
+        self.send_line(f'{tag} OK SORT completed')
+
+    def cmd_UID(self, tag, args):
+        command, rest = (args.split(' ', 1) + [''])[:2]
+        handler = getattr(self, f'cmd_{command.upper()}', None)
+        if handler is None:
+            self.send_line(f'{tag} BAD Unsupported UID command')
+            return
+        handler(tag, rest, uid=True)
+
+    def cmd_IDLE(self, tag, args):
+        mailbox = self.server.mailboxes[self.selected]
+        announced = len(mailbox.messages)
+        self.send_line('+ idling')
+        while True:
+            line = self.read_line(timeout=0.05)
+            if line is None:
+                return False
+            if line.upper() == b'DONE':
+                self.send_line(f'{tag} OK IDLE terminated')
+                return
+            count = len(mailbox.messages)
+            if count != announced:
+                announced = count
+                self.send_line(f'* {count} EXISTS')
+
+
+class FakeIMAPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 username: str = None, password: str = None, folders=('INBOX',),
+                 capabilities: str = CAPABILITIES, ssl_context: ssl.SSLContext = None,
+                 latency: Dict[str, float] = None):
+        """
+        In-memory IMAP server listening on host:port (port 0 picks a free one)
+
+        Args:
+            username: Expected LOGIN user; any credentials are accepted when unset
+            password: Expected LOGIN password
+            folders: Mailboxes to create up front
+            capabilities: CAPABILITY line to advertise (GMAIL_CAPABILITIES enables X-GM-RAW)
+            ssl_context: Server-side context for implicit TLS (see make_self_signed_context)
+            latency: Seconds to sleep before handling a command, keyed by name
+                     ('CONNECT', 'LOGIN', 'SEARCH', 'UID FETCH', ...); '*' applies to all others
+        """
+        super().__init__((host, port), IMAPHandler)
+        self.credentials = (username, password) if username else None
+        self.mailboxes = {name: FakeMailbox() for name in folders}
+        self.capabilities = capabilities
+        self.ssl_context = ssl_context
+        self.latency = dict(latency or {})
+        self._thread = None
+
+    @property
+    def host(self):
+        return self.server_address[0]
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def pause(self, command: str):
+        """Hook called before every command is handled; injects the configured latency"""
+        delay = self.latency.get(command)
+        if delay is None and command.startswith('UID '):
+            delay = self.latency.get(command[4:])
+        if delay is None and command != 'CONNECT':
+            delay = self.latency.get('*')
+        if delay:
+            time.sleep(delay)
+
+    def deliver(self, raw: bytes, folder: str = 'INBOX', flags=(), labels=()) -> Dict[str, Any]:
+        """Add a message; clients idling on the folder are told about it"""
+        if isinstance(raw, str):
+            raw = raw.encode()
+        return self.mailboxes.setdefault(folder, FakeMailbox()).append(raw, flags, labels)
+
+    def seed_from_simulator(self, count: int = 100, folder: str = 'INBOX', simulator=None) -> int:
+        """Fill a folder with EmailSimulator output"""
+        if simulator is None:
+            from email_simulator import EmailSimulator
+            simulator = EmailSimulator()
+        for _ in range(count):
+            self.deliver(email_to_raw(simulator.generate_email()), folder)
+        return count
+
+    def seed_from_mbox(self, path: str, folder: str = 'INBOX', limit: int = None) -> int:
+        """Fill a folder with the messages of an mbox file"""
+        from mail_importer import iter_mbox_raw
+        count = 0
+        for raw in iter_mbox_raw(path):
+            if limit is not None and count >= limit:
+                break
+            self.deliver(raw, folder)
+            count += 1
+        return count
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ---- protocol helpers ------------------------------------------------------
+
+def tokenize(text: str) -> List[str]:
+    """Split IMAP arguments, keeping quoted strings, brackets and parenthesized lists whole"""
+    tokens, current, depth, quoted, escaped = [], '', 0, False, False
+    for char in text:
+        if quoted:
+            current += char
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                quoted = False
+            continue
+        if char == '"':
+            quoted = True
+        elif char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ' ' and depth == 0:
+            if current:
+                tokens.append(current)
+            current = ''
+            continue
+        current += char
+    if current:
+        tokens.append(current)
+    return tokens
+
+
+def unquote(token: str) -> str:
+    if len(token) >= 2 and token[0] == '"' and token[-1] == '"':
+        return re.sub(r'\\(.)', r'\1', token[1:-1])
+    return token
+
+
+def parse_ranges(message_set: str, maximum: int) -> List[Tuple[int, int]]:
+    """Turn an IMAP sequence set such as 1,3:5,7:* into inclusive (low, high) ranges"""
+    ranges = []
+    for part in message_set.split(','):
+        low, _, high = part.partition(':')
+        low = maximum if low == '*' else int(low)
+        high = low if not high else maximum if high == '*' else int(high)
+        ranges.append((min(low, high), max(low, high)))
+    return ranges
+
+
+def in_set(number: int, message_set: str, maximum: int) -> bool:
+    """Check membership in an IMAP sequence set such as 1,3:5,7:*"""
+    return any(low <= number <= high for low, high in parse_ranges(message_set, maximum))
+
+
+def selected_messages(messages, message_set: str, uid: bool):
+    if not messages:
+        return []
+    if uid:
+        ranges = parse_ranges(message_set, messages[-1]['uid'])
+        return [(seq, m) for seq, m in enumerate(messages, 1)
+                if any(low <= m['uid'] <= high for low, high in ranges)]
+    ranges = parse_ranges(message_set, len(messages))
+    numbers = sorted({seq for low, high in ranges for seq in range(max(low, 1), min(high, len(messages)) + 1)})
+    return [(seq, messages[seq - 1]) for seq in numbers]
+
+
+def parse_imap_date(value: str):
+    return datetime.strptime(unquote(value), '%d-%b-%Y').date()
+
+
+def matches_gmail_raw(message: Dict[str, Any], expression: str) -> bool:
+    """Tiny subset of Gmail search: from:, subject:, category:/label:, is:unread/starred and bare words"""
+    headers = message['headers']
+    for term in expression.lower().split():
+        field, _, value = term.partition(':')
+        if not value:
+            haystack = (str(headers.get('subject', '')) + ' ' + message['raw'].decode('utf-8', 'ignore')).lower()
+            if term not in haystack:
+                return False
+        elif field in ('from', 'subject'):
+            if value not in str(headers.get(field, '')).lower():
+                return False
+        elif field in ('category', 'label', 'in'):
+            if value not in message['labels']:
+                return False
+        elif term == 'is:unread':
+            if '\\Seen' in message['flags']:
+                return False
+        elif term == 'is:starred':
+            if '\\Flagged' not in message['flags']:
+                return False
+        else:
+            raise ValueError(f'Unsupported X-GM-RAW term {term}')
+    return True
+
+
+def matches(message: Dict[str, Any], seq: int, criteria: List[str], last_uid: int = 0, count: int = 0) -> bool:
+    """Evaluate a flat list of SEARCH keys (implicitly ANDed)"""
+    headers = message['headers']
+    received = message['internaldate'].date()
+    index = 0
+    while index < len(criteria):
+        key = criteria[index].upper()
+        index += 1
+        if key == 'ALL':
+            continue
+        if key == 'UID':
+            if not in_set(message['uid'], criteria[index], last_uid):
+                return False
+            index += 1
+        elif key in ('FROM', 'SUBJECT', 'TO'):
+            needle = unquote(criteria[index]).lower()
+            index += 1
+            if needle not in str(headers.get(key, '')).lower():
+                return False
+        elif key in ('SINCE', 'BEFORE', 'ON'):
+            day = parse_imap_date(criteria[index])
+            index += 1
+            if key == 'SINCE' and received < day:
+                return False
+            if key == 'BEFORE' and received >= day:
+                return False
+            if key == 'ON' and received != day:
+                return False
+        elif key in ('SEEN', 'UNSEEN', 'FLAGGED', 'UNFLAGGED'):
+            flag = '\\Seen' if key.endswith('SEEN') else '\\Flagged'
+            if (flag in message['flags']) == key.startswith('UN'):
+                return False
+        elif key in ('LARGER', 'SMALLER'):
+            size = int(criteria[index])
+            index += 1
+            if key == 'LARGER' and len(message['raw']) <= size:
+                return False
+            if key == 'SMALLER' and len(message['raw']) >= size:
+                return False
+        elif key == 'X-GM-RAW':
+            expression = unquote(criteria[index])
+            index += 1
+            if not matches_gmail_raw(message, expression):
+                return False
+        elif re.match(r'^[\d*]', key):
+            if not in_set(seq, key, count):
+                return False
+        else:
+            raise ValueError(f'Unsupported search key {key}')
+    return True
+
+
+def fetch_response(message: Dict[str, Any], items: List[str]) -> bytes:
+    raw = message['raw']
+    parts = []
+    for item in items:
+        name = item.upper()
+        if name == 'UID':
+            parts.append(b'UID %d' % message['uid'])
+        elif name == 'FLAGS':
+            parts.append(('FLAGS (%s)' % ' '.join(sorted(message['flags']))).encode())
+        elif name == 'X-GM-MSGID':
+            parts.append(b'X-GM-MSGID %d' % message['gm_msgid'])
+        elif name == 'RFC822.SIZE':
+            parts.append(b'RFC822.SIZE %d' % len(raw))
+        elif name in ('RFC822', 'BODY[]', 'BODY.PEEK[]'):
+            label = b'RFC822' if name == 'RFC822' else b'BODY[]'
+            parts.append(label + b' {%d}\r\n' % len(raw) + raw)
+        elif name in ('RFC822.HEADER', 'BODY.PEEK[HEADER]', 'BODY[HEADER]'):
+            header = raw.split(b'\r\n\r\n', 1)[0] + b'\r\n\r\n'
+            label = b'RFC822.HEADER' if name == 'RFC822.HEADER' else b'BODY[HEADER]'
+            parts.append(label + b' {%d}\r\n' % len(header) + header)
+        elif name.startswith(('BODY[HEADER.FIELDS', 'BODY.PEEK[HEADER.FIELDS')):
+            fields = item[item.index('(') + 1:item.index(')')].split()
+            header = b''.join(
+                f'{field}: {value}\r\n'.encode()
+                for field in fields for value in message['headers'].get_all(field, [])
+            ) + b'\r\n'
+            label = ('BODY[HEADER.FIELDS (%s)]' % ' '.join(fields).upper()).encode()
+            parts.append(label + b' {%d}\r\n' % len(header) + header)
+        else:
+            raise ValueError(f'Unsupported fetch item {item}')
+    return b' '.join(parts)
+
+
+# ---- seeding and TLS helpers -----------------------------------------------
+
+def email_to_raw(email_data: Dict[str, Any]) -> bytes:
+    """Render a simulator email dict as an RFC822 message"""
+    message = EmailMessage()
+    message['From'] = email_data.get('sender', 'unknown@example.com')
+    message['To'] = 'me@example.com'
+    message['Subject'] = email_data.get('subject', '')
+    timestamp = email_data.get('timestamp')
+    sent = datetime.fromisoformat(timestamp) if timestamp else datetime.now()
+    message['Date'] = format_datetime(sent.astimezone())
+    message['Message-ID'] = make_msgid(domain='fake-imap.local')
+    message.set_content(email_data.get('body', ''))
+    for name in email_data.get('attachments', []):
+        message.add_attachment(b'x' * 1024, maintype='application', subtype='octet-stream', filename=name)
+    return message.as_bytes()
+
+
+def make_self_signed_context(directory: str = None) -> Tuple[ssl.SSLContext, ssl.SSLContext]:
+    """
+    Create a throwaway localhost certificate with the openssl CLI
+
+    Returns (server_context, client_context); the client context trusts
+    only that certificate. The PEM files are kept in directory when one is
+    given, otherwise they are deleted once both contexts have loaded them.
+    """
+    if directory is None:
+        with tempfile.TemporaryDirectory(prefix='fake-imap-') as scratch:
+            return make_self_signed_context(scratch)
+
+    cert_path = os.path.join(directory, 'cert.pem')
+    key_path = os.path.join(directory, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-keyout', key_path, '-out', cert_path, '-subj', '/CN=localhost',
+         '-addext', 'subjectAltName=DNS:localhost,IP:127.0.0.1'],
+        check=True, capture_output=True
+    )
+    server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server_context.load_cert_chain(cert_path, key_path)
+    client_context = ssl.create_default_context(cafile=cert_path)
+    return server_context, client_context
+
+
+def parse_latency(values: List[str]) -> Dict[str, float]:
+    """Turn ['FETCH=0.05', '*=0.01'] into a latency map"""
+    latency = {}
+    for value in values or []:
+        command, _, seconds = value.partition('=')
+        latency[command.upper()] = float(seconds)
+    return latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in IMAP server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=1143)
+    parser.add_argument('--seed', type=int, default=100, help="Simulated emails to put in INBOX")
+    parser.add_argument('--mbox', help="Seed INBOX from this mbox file instead")
+    parser.add_argument('--tls', action='store_true', help="Serve implicit TLS with a self-signed certificate")
+    parser.add_argument('--gmail', action='store_true', help="Advertise X-GM-EXT-1")
+    parser.add_argument('--latency', action='append', metavar='COMMAND=SECONDS',
+                        help="Per-command delay, e.g. FETCH=0.05 or *=0.01 (repeatable)")
+    args = parser.parse_args()
+
+    ssl_context = None
+    if args.tls:
+        ssl_context, _ = make_self_signed_context()
+    server = FakeIMAPServer(args.host, args.port, ssl_context=ssl_context, latency=parse_latency(args.latency),
+                            capabilities=GMAIL_CAPABILITIES if args.gmail else CAPABILITIES)
+    seeded = server.seed_from_mbox(args.mbox) if args.mbox else server.seed_from_simulator(args.seed)
+
+    print(f"📮 Fake IMAP server on {server.host}:{server.port} ({'TLS' if args.tls else 'plain'}) "
+          f"with {seeded} emails - Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
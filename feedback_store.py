@@ -0,0 +1,114 @@
+import sqlite3
+import threading
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+# Default database, next to agent_memory.json
+FEEDBACK_DB = "feedback_history.db"
+
+# Fields of CognitiveAgent.receive_feedback entries, in table order
+COLUMNS = ('timestamp', 'sender', 'subject', 'predicted_action', 'user_feedback',
+           'correct_action', 'reward', 'confidence')
+
+
+class FeedbackStore:
+    def __init__(self, path: str = FEEDBACK_DB):
+        """
+        SQLite table of feedback entries with indexed filters
+
+        Views ask for counts, aggregates and one page of rows at a time, so
+        the history is never loaded into memory as a whole.
+
+        Args:
+            path: Database file, or ':memory:' for a private in-memory store
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # Streamlit reruns a session's script on different threads
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if path != ':memory:':
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS feedback (
+                    id INTEGER PRIMARY KEY,
+                    timestamp TEXT, sender TEXT, subject TEXT, predicted_action TEXT,
+                    user_feedback TEXT, correct_action TEXT, reward REAL, confidence REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS feedback_sender ON feedback (sender, id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS feedback_type ON feedback (user_feedback, id)")
+
+    def append(self, entry: Dict[str, Any]):
+        self.extend([entry])
+
+    def extend(self, entries: Iterable[Dict[str, Any]]):
+        rows = [tuple(entry.get(column) for column in COLUMNS) for entry in entries]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO feedback ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows
+            )
+
+    def __len__(self) -> int:
+        return self.count()
+
+    @staticmethod
+    def _where(sender: Optional[str], feedback: Optional[str]) -> Tuple[str, list]:
+        clauses, params = [], []
+        if sender is not None:
+            clauses.append("sender = ?")
+            params.append(sender)
+        if feedback is not None:
+            clauses.append("user_feedback = ?")
+            params.append(feedback)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _query(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def count(self, sender: Optional[str] = None, feedback: Optional[str] = None) -> int:
+        where, params = self._where(sender, feedback)
+        return self._query(f"SELECT COUNT(*) FROM feedback{where}", params)[0][0]
+
+    def page(self, offset: int = 0, limit: int = 50, sender: Optional[str] = None,
+             feedback: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Matching entries, newest first, from offset up to limit rows"""
+        where, params = self._where(sender, feedback)
+        rows = self._query(
+            f"SELECT {', '.join(COLUMNS)} FROM feedback{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        )
+        return [dict(row) for row in rows]
+
+    def senders(self) -> List[str]:
+        """Distinct senders, read from the sender index"""
+        return [row[0] for row in self._query("SELECT DISTINCT sender FROM feedback ORDER BY sender")]
+
+    def recent(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Last entries, oldest first"""
+        return self.page(0, limit)[::-1]
+
+    def top(self, column: str, limit: int = 5) -> List[Tuple[Any, int]]:
+        """Most frequent values of a column with their counts, ties in first-seen order"""
+        if column not in COLUMNS:
+            raise ValueError(f"Unknown feedback column: {column}")
+        rows = self._query(
+            f"SELECT {column}, COUNT(*) AS n FROM feedback GROUP BY {column} ORDER BY n DESC, MIN(id) LIMIT ?",
+            (limit,)
+        )
+        return [tuple(row) for row in rows]
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals: entries, approvals, unique senders, average reward and confidence"""
+        row = self._query("""
+            SELECT COUNT(*), COALESCE(SUM(user_feedback = 'approve'), 0),
+                   COUNT(DISTINCT sender), COALESCE(AVG(reward), 0), COALESCE(AVG(confidence), 0)
+            FROM feedback
+        """)[0]
+        return {'total': row[0], 'approvals': row[1], 'unique_senders': row[2],
+                'avg_reward': row[3], 'avg_confidence': row[4]}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
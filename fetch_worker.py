@@ -0,0 +1,79 @@
+import threading
+import time
+from typing import List, Dict, Any, Container, Optional, Union
+
+from email_query import EmailQuery
+
+
+class FetchJob:
+    def __init__(self, fetcher, query: Union[str, EmailQuery] = 'ALL', limit: int = 10,
+                 folder: str = 'INBOX', known: Container[str] = (), description: str = "emails"):
+        """
+        One RealEmailFetcher.fetch_new_emails call on a daemon thread
+
+        The UI polls the job instead of blocking on the IMAP exchange:
+        parsed emails are collected as they arrive and handed out by
+        take_new, and keys is set once the fetch has finished.
+
+        Args:
+            fetcher: RealEmailFetcher; nothing else should use it while the job runs
+            query: Search to run, as for fetch_new_emails
+            limit: Newest matches to return
+            folder: Mailbox to search
+            known: Message keys that need no download, e.g. a snapshot of a MessageStore
+            description: What is being fetched, for status messages
+        """
+        self.fetcher = fetcher
+        self.query = query
+        self.limit = limit
+        self.folder = folder
+        self.known = known
+        self.description = description
+
+        self.emails = []
+        self.keys = None
+        self.started = None
+        self.finished = None
+        self._taken = 0
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name="fetch-job", daemon=True)
+
+    def start(self) -> 'FetchJob':
+        self.started = time.monotonic()
+        self.thread.start()
+        return self
+
+    def _run(self):
+        try:
+            keys, _ = self.fetcher.fetch_new_emails(self.query, self.limit, self.folder,
+                                                    known=self.known, on_email=self._arrived)
+            self.keys = keys
+        except Exception as e:
+            print(f"❌ Background fetch failed: {e}")
+            self.keys = []
+        finally:
+            self.finished = time.monotonic()
+
+    def _arrived(self, email_data: Dict[str, Any]):
+        with self._lock:
+            self.emails.append(email_data)
+
+    @property
+    def done(self) -> bool:
+        return self.finished is not None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def take_new(self) -> List[Dict[str, Any]]:
+        """Emails parsed since the previous call"""
+        with self._lock:
+            new = self.emails[self._taken:]
+            self._taken = len(self.emails)
+        return new
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the fetch has finished; returns whether it did"""
+        self.thread.join(timeout)
+        return self.done
@@ -0,0 +1,118 @@
+import re
+from html.parser import HTMLParser
+
+# Upper bound on extracted text; longer bodies are cut and parsing stops early
+MAX_TEXT_CHARS = 50_000
+
+# Input is fed to the parser in slices so it can stop once output is full
+FEED_CHUNK_CHARS = 16 * 1024
+
+# Placeholders such as [image: logo] are dropped; the length cap keeps the
+# match bounded so bracket-heavy newsletters cannot cause backtracking
+MAX_BRACKET_CHARS = 200
+_BRACKET_RE = re.compile(r'\[[^\[\]\n]{0,%d}\]' % MAX_BRACKET_CHARS)
+_URL_RE = re.compile(r'https?://[^\s]+')
+_BLANK_LINES_RE = re.compile(r'\n[^\S\n]*(?:\n[^\S\n]*)+')
+_SPACES_RE = re.compile(r'[^\S\n]+')
+
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'div', 'dl', 'dt', 'dd', 'footer',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'ol', 'p', 'pre',
+    'section', 'table', 'tr', 'ul'
+}
+SKIP_TAGS = {'head', 'script', 'style', 'template', 'title'}
+
+
+class _OutputFull(Exception):
+    pass
+
+
+class HTMLTextExtractor(HTMLParser):
+    """Single-pass HTML (or plain text) to readable text converter"""
+
+    def __init__(self, max_chars: int = MAX_TEXT_CHARS):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.truncated = False
+        self._chunks = []
+        self._length = 0
+        self._skip_depth = 0
+        self._carry = ''
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._emit('\n')
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._emit('\n')
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._emit('\n')
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        data = self._carry + data
+        self._carry = ''
+
+        # Hold back an unclosed placeholder so it can be matched with the next chunk
+        start = data.rfind('[')
+        if start != -1 and ']' not in data[start:] and '\n' not in data[start:] \
+                and len(data) - start <= MAX_BRACKET_CHARS:
+            self._carry = data[start:]
+            data = data[:start]
+
+        self._emit(_BRACKET_RE.sub('', data))
+
+    def _emit(self, text):
+        if not text:
+            return
+        self._chunks.append(text)
+        self._length += len(text)
+        if self._length >= self.max_chars:
+            self.truncated = True
+            raise _OutputFull
+
+    def text(self) -> str:
+        """Normalized text collected so far"""
+        return _normalize(''.join(self._chunks) + self._carry, self.max_chars)
+
+
+def _normalize(text: str, max_chars: int) -> str:
+    """Collapse whitespace, cap the length and mark links"""
+    text = _SPACES_RE.sub(' ', text)
+    text = text.replace(' \n', '\n').replace('\n ', '\n')
+    text = _BLANK_LINES_RE.sub('\n\n', text)
+    text = text.strip()[:max_chars]
+    # Make links stand out
+    return _URL_RE.sub(lambda m: f"🔗 {m.group(0)}", text)
+
+
+def clean_text(text, max_chars: int = MAX_TEXT_CHARS) -> str:
+    """Clean email text content"""
+    if not text:
+        return ""
+
+    # Decode if needed
+    if isinstance(text, bytes):
+        text = text.decode('utf-8', errors='ignore')
+
+    # Plain text has no tags or entities for the parser to handle
+    if '<' not in text and '&' not in text:
+        return _normalize(_BRACKET_RE.sub('', text), max_chars)
+
+    extractor = HTMLTextExtractor(max_chars)
+    try:
+        for start in range(0, len(text), FEED_CHUNK_CHARS):
+            extractor.feed(text[start:start + FEED_CHUNK_CHARS])
+        extractor.close()
+    except _OutputFull:
+        pass
+
+    return extractor.text()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Offline bulk importer for mbox files, Maildir folders and directories of .eml files
+Messages are streamed one at a time and parsed into the same email dicts
+RealEmailFetcher returns, so large archives import in constant memory
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterator, Callable
+
+from mime_parser import parse_email_batch
+
+# Messages parsed per batch; bounds memory regardless of archive size
+DEFAULT_BATCH_SIZE = 256
+
+_ESCAPED_FROM_RE = re.compile(rb'^>+From ')
+
+
+def iter_mbox_raw(path: str) -> Iterator[bytes]:
+    """Yield raw messages from an mbox file, reading it line by line"""
+    lines = []
+    previous_blank = True
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.startswith(b'From ') and previous_blank:
+                if lines:
+                    yield b''.join(lines)
+                lines = []
+            else:
+                # mboxrd quoting: ">From " lines lose one ">"
+                if _ESCAPED_FROM_RE.match(line):
+                    line = line[1:]
+                lines.append(line)
+            previous_blank = line in (b'\n', b'\r\n')
+    if lines:
+        yield b''.join(lines)
+
+
+def iter_maildir_raw(path: str) -> Iterator[bytes]:
+    """Yield raw messages from a Maildir's new/ and cur/ folders"""
+    for sub in ('new', 'cur'):
+        folder = os.path.join(path, sub)
+        if not os.path.isdir(folder):
+            continue
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.startswith('.'):
+                    with open(entry.path, 'rb') as f:
+                        yield f.read()
+
+
+def iter_eml_raw(path: str) -> Iterator[bytes]:
+    """Yield the single message stored in an .eml file"""
+    with open(path, 'rb') as f:
+        yield f.read()
+
+
+def iter_eml_dir_raw(path: str) -> Iterator[bytes]:
+    """Yield raw messages from every .eml file below a directory"""
+    for root, _, files in os.walk(path):
+        for name in files:
+            if name.lower().endswith('.eml'):
+                with open(os.path.join(root, name), 'rb') as f:
+                    yield f.read()
+
+
+def detect_format(path: str) -> str:
+    """Guess the archive type: 'mbox', 'maildir', 'eml' or 'eml_dir'"""
+    if os.path.isdir(path):
+        if all(os.path.isdir(os.path.join(path, sub)) for sub in ('cur', 'new')):
+            return 'maildir'
+        return 'eml_dir'
+    if path.lower().endswith('.eml'):
+        return 'eml'
+    return 'mbox'
+
+
+def iter_archive_raw(path: str, archive_format: str = None) -> Iterator[bytes]:
+    """Yield raw messages from any supported archive"""
+    archive_format = archive_format or detect_format(path)
+    if archive_format == 'mbox':
+        return iter_mbox_raw(path)
+    if archive_format == 'maildir':
+        return iter_maildir_raw(path)
+    if archive_format == 'eml_dir':
+        return iter_eml_dir_raw(path)
+    if archive_format == 'eml':
+        return iter_eml_raw(path)
+    raise ValueError(f"Unknown archive format: {archive_format}")
+
+
+class ImportStats:
+    def __init__(self):
+        """Running counters for an import"""
+        self.messages = 0
+        self.failed = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.messages / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'messages': self.messages,
+            'failed': self.failed,
+            'megabytes': round(self.bytes / 1e6, 2),
+            'seconds': round(self.elapsed, 2),
+            'messages_per_second': round(self.messages_per_second, 1)
+        }
+
+
+def iter_archive(path: str, archive_format: str = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 executor=None, stats: ImportStats = None, limit: int = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield parsed email dicts from an archive
+
+    Raw messages are collected in batches of batch_size and parsed with
+    mime_parser.parse_email_batch, in the executor when one is given and
+    inline otherwise.
+    """
+    stats = stats or ImportStats()
+    batch = []
+    seen = 0
+
+    def flush():
+        # Without an executor, parse inline rather than letting each batch start a pool
+        for email_data in parse_email_batch(batch, max_workers=1 if executor is None else None, executor=executor):
+            if email_data is None:
+                stats.failed += 1
+                continue
+            stats.messages += 1
+            yield email_data
+
+    for raw in iter_archive_raw(path, archive_format):
+        if limit is not None and seen >= limit:
+            break
+        seen += 1
+        stats.bytes += len(raw)
+        batch.append((f"import_{seen}", raw))
+        if len(batch) >= batch_size:
+            yield from flush()
+            batch = []
+    if batch:
+        yield from flush()
+
+
+def import_archive(path: str, agent=None, on_email: Callable = None, archive_format: str = None,
+                   batch_size: int = DEFAULT_BATCH_SIZE, workers: int = None, limit: int = None,
+                   report_every: int = 1000) -> Dict[str, Any]:
+    """
+    Stream an archive through the prediction pipeline
+
+    Args:
+        path: mbox file, Maildir directory, .eml file or directory of .eml files
+        agent: Optional CognitiveAgent; each email is run through predict_action
+        on_email: Optional callback(email_data, prediction) for replay or export
+        archive_format: Force 'mbox', 'maildir', 'eml' or 'eml_dir' instead of detecting it
+        batch_size: Messages parsed per batch
+        workers: Parser processes (1 parses inline)
+        limit: Stop after this many messages
+        report_every: Print progress every N messages (0 to disable)
+
+    Returns:
+        Import statistics including messages per second
+    """
+    stats = ImportStats()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+    next_report = report_every
+
+    try:
+        for email_data in iter_archive(path, archive_format, batch_size, executor, stats, limit):
+            prediction = agent.predict_action(email_data) if agent is not None else None
+            if on_email:
+                on_email(email_data, prediction)
+            if report_every and stats.messages >= next_report:
+                next_report += report_every
+                print(f"📥 {stats.messages:,} messages ({stats.messages_per_second:,.0f} msg/s)")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return stats.as_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help="mbox file, Maildir, .eml file or directory of .eml files")
+    parser.add_argument('--format', choices=['mbox', 'maildir', 'eml', 'eml_dir'], help="Skip auto-detection")
+    parser.add_argument('--predict', action='store_true', help="Run CognitiveAgent.predict_action on every email")
+    parser.add_argument('--output', help="Write one JSON line per email (with prediction) to this file")
+    parser.add_argument('--workers', type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--limit', type=int, default=None)
+    args = parser.parse_args()
+
+    agent = None
+    if args.predict:
+        from cognitive_agent import CognitiveAgent
+        agent = CognitiveAgent()
+
+    output = open(args.output, 'w') if args.output else None
+
+    def write_line(email_data, prediction):
+        record = dict(email_data)
+        if prediction is not None:
+            record['prediction'] = {
+                'action': prediction['action'],
+                'confidence': prediction['confidence'],
+                'explanation': prediction['explanation']
+            }
+        output.write(json.dumps(record, default=str) + '\n')
+
+    print(f"📦 Importing {args.path}...")
+    try:
+        stats = import_archive(args.path, agent, write_line if output else None, args.format,
+                               args.batch_size, args.workers, args.limit)
+    finally:
+        if output:
+            output.close()
+
+    print(f"✅ Imported {stats['messages']:,} messages ({stats['megabytes']} MB) in {stats['seconds']}s "
+          f"- {stats['messages_per_second']:,} msg/s, {stats['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
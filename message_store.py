@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+from email_query import EmailQuery
+
+# Oldest messages are dropped once the store holds this many
+MAX_MESSAGES = 1000
+
+
+class MessageStore:
+    def __init__(self, max_messages: int = MAX_MESSAGES):
+        """
+        Session-level index of fetched emails keyed by message key
+
+        The key is Gmail's X-GM-MSGID when available, otherwise the Message-ID
+        header (see RealEmailFetcher.fetch_message_keys). Refreshes merge into
+        the store, so each message is parsed once and its prediction is
+        reused until the agent learns something new.
+
+        Args:
+            max_messages: Upper bound on stored messages
+        """
+        self.max_messages = max_messages
+        self.messages = OrderedDict()
+        self.predictions = {}
+
+    def __contains__(self, key) -> bool:
+        return key in self.messages
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    @staticmethod
+    def key_for(email_data: Dict[str, Any]) -> Optional[str]:
+        return email_data.get('message_key') or email_data.get('message_id')
+
+    def add(self, email_data: Dict[str, Any]) -> Tuple[str, bool]:
+        """Store an email unless its key is known; returns (key, added)"""
+        key = self.key_for(email_data)
+        if key in self.messages:
+            return key, False
+
+        email_data['message_key'] = key
+        self.messages[key] = email_data
+        while len(self.messages) > self.max_messages:
+            old_key, _ = self.messages.popitem(last=False)
+            self.predictions.pop(old_key, None)
+        return key, True
+
+    def merge(self, emails: List[Dict[str, Any]]) -> int:
+        """Add a batch of emails and return how many were new"""
+        return sum(self.add(email_data)[1] for email_data in emails)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.messages.get(key)
+
+    def get_many(self, keys: List[str]) -> List[Dict[str, Any]]:
+        """Stored emails for the keys, in the given order"""
+        return [self.messages[key] for key in keys if key in self.messages]
+
+    def sync(self, fetcher, query: Union[str, EmailQuery] = 'ALL', limit: int = 10,
+             folder: str = 'INBOX') -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Refresh a query result, downloading only messages the store lacks
+
+        Returns the matching emails (oldest first) and the number that were new.
+        """
+        keys, new_emails = fetcher.fetch_new_emails(query, limit, folder, known=self)
+        added = self.merge(new_emails)
+        return self.get_many(keys), added
+
+    def predict(self, agent, email_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Agent prediction for an email, cached for stored messages
+
+        A cached prediction is reused until the agent receives more feedback.
+        """
+        key = self.key_for(email_data)
+        if key not in self.messages:
+            return agent.predict_action(email_data)
+
+        version = agent.feedback_version
+        cached = self.predictions.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        prediction = agent.predict_action(email_data)
+        self.predictions[key] = (version, prediction)
+        return prediction
+
+    def clear(self):
+        self.messages.clear()
+        self.predictions.clear()
@@ -0,0 +1,302 @@
+import email.utils
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from email.header import decode_header, make_header
+from email.message import Message
+from email.parser import BytesFeedParser, BytesHeaderParser
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+from html_text import clean_text
+
+# Bytes handed to the feed parser per step; parsing stops between steps
+CHUNK_SIZE = 64 * 1024
+
+# Batches smaller than this are parsed inline, pool start-up would dominate
+PARALLEL_THRESHOLD = 64
+
+# Process pool reused by every live fetch, see shared_executor
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+HIGH_PRIORITY_WORDS = ["urgent", "asap", "important", "critical"]
+LOW_PRIORITY_WORDS = ["newsletter", "update", "weekly"]
+
+
+def decode_header_value(value) -> str:
+    """Decode an RFC 2047 header into text, tolerating bad charsets"""
+    if not value:
+        return ""
+    try:
+        return str(make_header(decode_header(value)))
+    except (UnicodeError, LookupError, ValueError):
+        chunk = decode_header(value)[0][0]
+        return chunk.decode('utf-8', errors='replace') if isinstance(chunk, bytes) else chunk
+
+
+def guess_priority(subject: str) -> str:
+    """Determine priority based on subject keywords"""
+    subject = subject.lower()
+    if any(word in subject for word in HIGH_PRIORITY_WORDS):
+        return "high"
+    if any(word in subject for word in LOW_PRIORITY_WORDS):
+        return "low"
+    return "medium"
+
+
+def decode_part(part: Message) -> str:
+    """Decode a single text part using its declared charset"""
+    payload = part.get_payload(decode=True)
+    if payload is None:
+        return str(part.get_payload())
+    charset = part.get_content_charset() or 'utf-8'
+    try:
+        return payload.decode(charset, errors='replace')
+    except LookupError:
+        return payload.decode('utf-8', errors='replace')
+
+
+def is_attachment(part: Message) -> bool:
+    return 'attachment' in str(part.get('Content-Disposition', '')).lower()
+
+
+def message_body(msg: Message) -> str:
+    """Extract email body from a fully parsed message"""
+    if not msg.is_multipart():
+        return clean_text(decode_part(msg))
+    for part in msg.walk():
+        if part.get_content_type() == "text/plain" and not is_attachment(part):
+            return clean_text(decode_part(part))
+    return ""
+
+
+def message_attachments(msg: Message) -> List[Dict[str, Any]]:
+    """Extract attachment information from a fully parsed message"""
+    attachments = []
+    if msg.is_multipart():
+        for part in msg.walk():
+            if part.get_content_maintype() == 'multipart':
+                continue
+            if part.get('Content-Disposition') is None:
+                continue
+            filename = part.get_filename()
+            if filename:
+                attachments.append({
+                    'name': filename,
+                    'size': len(part.get_payload()),
+                    'type': part.get_content_type()
+                })
+    return attachments
+
+
+class _PartRecorder:
+    """Message factory that remembers every part in the order the parser opens it"""
+
+    def __init__(self):
+        self.parts = []
+
+    def __call__(self, *args, **kwargs):
+        part = Message(*args, **kwargs)
+        self.parts.append(part)
+        return part
+
+
+def _first_text_part(parts: List[Message], complete_only: bool) -> Optional[Message]:
+    """First text/plain part, falling back to text/html; with complete_only, skip the part still being fed"""
+    candidates = parts[:-1] if complete_only else parts
+    html = None
+    for part in candidates:
+        if part.is_multipart() or is_attachment(part):
+            continue
+        content_type = part.get_content_type()
+        if content_type == 'text/plain':
+            return part
+        if content_type == 'text/html' and html is None:
+            html = part
+    return None if complete_only else html
+
+
+def _header_block_end(raw: bytes, start: int) -> Tuple[int, int]:
+    """Offsets of the blank line ending a header block and of the body after it"""
+    crlf = raw.find(b'\r\n\r\n', start)
+    lf = raw.find(b'\n\n', start)
+    if crlf != -1 and (lf == -1 or crlf < lf):
+        return crlf, crlf + 4
+    if lf != -1:
+        return lf, lf + 2
+    return len(raw), len(raw)
+
+
+def scan_attachments(raw: bytes, boundary: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    List attachments by walking MIME boundaries in the raw bytes
+
+    Only part headers are parsed; attachment payloads are measured by
+    offset and never split into lines or decoded.
+    """
+    if not boundary:
+        return []
+
+    header_parser = BytesHeaderParser()
+    boundaries = {boundary.encode()}
+    attachments = []
+    current = None
+    pos = 0
+
+    while True:
+        index = raw.find(b'\n--', pos)
+        if index == -1:
+            break
+        line_end = raw.find(b'\n', index + 1)
+        if line_end == -1:
+            line_end = len(raw)
+        token = raw[index + 3:line_end].rstrip()
+        closing = token.endswith(b'--') and token[:-2] in boundaries
+        if not closing and token not in boundaries:
+            pos = index + 3
+            continue
+
+        if current is not None:
+            headers, body_start = current
+            body_end = index - 1 if raw[index - 1:index] == b'\r' else index
+            attachments.append({
+                'name': headers.get_filename(),
+                'size': max(0, body_end - body_start),
+                'type': headers.get_content_type()
+            })
+            current = None
+
+        pos = line_end
+        if closing:
+            continue
+
+        header_end, body_start = _header_block_end(raw, line_end + 1)
+        headers = header_parser.parsebytes(raw[line_end + 1:header_end])
+        if headers.get_content_maintype() == 'multipart':
+            nested = headers.get_boundary()
+            if nested:
+                boundaries.add(nested.encode())
+        elif headers.get('Content-Disposition') is not None and headers.get_filename():
+            current = (headers, body_start)
+        pos = body_start
+
+    return attachments
+
+
+def parse_raw_email(raw_email: bytes, message_number=None, chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Build the email dict for one raw RFC822 message
+
+    The message is streamed through BytesFeedParser in chunks and parsing
+    stops once the first complete text/plain part has been seen, so large
+    trailing attachments are never parsed.
+    """
+    recorder = _PartRecorder()
+    parser = BytesFeedParser(_factory=recorder)
+    # The parser probes its factory once while setting up
+    recorder.parts.clear()
+
+    for start in range(0, len(raw_email), chunk_size):
+        parser.feed(raw_email[start:start + chunk_size])
+        if len(recorder.parts) > 1 and _first_text_part(recorder.parts, complete_only=True) is not None:
+            break
+    msg = parser.close()
+
+    if msg.is_multipart():
+        text_part = _first_text_part(recorder.parts, complete_only=False)
+        body = clean_text(decode_part(text_part)) if text_part is not None else ""
+    else:
+        body = clean_text(decode_part(msg))
+
+    subject = decode_header_value(msg["subject"])
+    sender = decode_header_value(msg["from"])
+
+    parsed_date = None
+    if msg["date"]:
+        try:
+            parsed_date = email.utils.parsedate_to_datetime(msg["date"])
+        except (TypeError, ValueError):
+            parsed_date = None
+    if parsed_date is None:
+        parsed_date = datetime.now()
+
+    if isinstance(message_number, bytes):
+        message_number = message_number.decode()
+
+    return {
+        'subject': subject or "No Subject",
+        'sender': sender or "Unknown Sender",
+        'timestamp': parsed_date.isoformat(),
+        'priority': guess_priority(subject),
+        'body': body,
+        'attachments': scan_attachments(raw_email, msg.get_boundary()) if msg.is_multipart() else [],
+        'message_id': msg["message-id"] or f"msg_{message_number}",
+        'real_email': True
+    }
+
+
+def _parse_item(item: Tuple[Any, bytes]) -> Optional[Dict[str, Any]]:
+    message_number, raw_email = item
+    try:
+        return parse_raw_email(raw_email, message_number)
+    except Exception as e:
+        print(f"❌ Error processing email {message_number}: {e}")
+        return None
+
+
+def _pool_context():
+    """
+    Start method for parser pools
+
+    Pools are created from fetch threads; forking a threaded process can
+    copy a held lock into the child and deadlock it, so workers are started
+    fresh by a fork server, or spawned where that is unavailable.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def shared_executor() -> Optional[Executor]:
+    """
+    Parser pool for large live fetches, started on first use and kept alive
+
+    Returns None on single-CPU machines, where a pool only adds overhead.
+    """
+    global _shared_pool
+    if (os.cpu_count() or 1) < 2:
+        return None
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ProcessPoolExecutor(mp_context=_pool_context())
+        return _shared_pool
+
+
+def parse_email_batch(raw_emails: Sequence[Tuple[Any, bytes]], max_workers: int = None,
+                      use_processes: bool = True, executor: Executor = None) -> List[Optional[Dict[str, Any]]]:
+    """
+    Parse (message_number, raw_bytes) pairs, in parallel for large batches
+
+    Results keep input order; messages that fail to parse come back as None.
+
+    Args:
+        raw_emails: Pairs as returned by an IMAP fetch
+        max_workers: Pool size, defaults to the number of CPUs
+        use_processes: Use a process pool (parsing is CPU-bound and holds the GIL)
+        executor: Reuse an existing pool across batches instead of starting one
+    """
+    workers = max_workers or os.cpu_count() or 1
+    if executor is None and (workers == 1 or len(raw_emails) < PARALLEL_THRESHOLD):
+        return [_parse_item(item) for item in raw_emails]
+
+    chunksize = max(1, len(raw_emails) // (workers * 4))
+    if executor is not None:
+        return list(executor.map(_parse_item, raw_emails, chunksize=chunksize))
+
+    if use_processes:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context())
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+    with pool:
+        return list(pool.map(_parse_item, raw_emails, chunksize=chunksize))
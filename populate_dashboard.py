@@ -23,6 +23,7 @@ def populate_dashboard():
     
     email_types = ["urgent", "question", "newsletter"]
     feedback_types = ["approve", "reject", "approve", "reject", "approve"]
+    analyzed_emails, predictions = [], []
     
     for i in range(5):
         # Generate email
@@ -33,9 +34,8 @@ def populate_dashboard():
         
         # Get prediction
         prediction = agent.predict_action(email)
-        
-        # Generate stealth log
-        stealth_entry = stego.generate_stealth_log(email, prediction)
+        analyzed_emails.append(email)
+        predictions.append(prediction)
         
         # Provide feedback
         feedback = agent.receive_feedback(
@@ -47,7 +47,7 @@ def populate_dashboard():
         print(f"   Email {i+1}: {email['subject']}")
         print(f"   Action: {prediction['action']} (Confidence: {prediction['confidence']:.3f})")
         print(f"   Feedback: {feedback_types[i].upper()}")
-        print(f"   Stealth: {stealth_entry['emoji_trigger']}")
+        print(f"   Stealth: {stego.create_emoji_trigger(prediction['action'], prediction['confidence'])}")
         print()
     
     # Generate some emails from other senders
@@ -63,7 +63,8 @@ def populate_dashboard():
     for i, sender in enumerate(other_senders):
         email = simulator.generate_email(sender=sender)
         prediction = agent.predict_action(email)
-        stealth_entry = stego.generate_stealth_log(email, prediction)
+        analyzed_emails.append(email)
+        predictions.append(prediction)
         
         # Provide feedback (alternate approve/reject)
         feedback_type = "approve" if i % 2 == 0 else "reject"
@@ -72,9 +73,13 @@ def populate_dashboard():
         print(f"   Email {i+6}: {email['subject']} (from {sender})")
         print(f"   Action: {prediction['action']} (Confidence: {prediction['confidence']:.3f})")
         print(f"   Feedback: {feedback_type.upper()}")
-        print(f"   Stealth: {stealth_entry['emoji_trigger']}")
+        print(f"   Stealth: {stego.create_emoji_trigger(prediction['action'], prediction['confidence'])}")
         print()
     
+    # Render all stealth logs in one batch
+    stealth_entries = stego.generate_stealth_logs(analyzed_emails, predictions)
+    print(f"🕵️ Generated {len(stealth_entries)} stealth logs")
+    
     # Save the data
     agent.save_memory()
     simulator.save_inbox()
@@ -0,0 +1,135 @@
+import imaplib
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Any
+
+# Errors worth retrying: socket failures and timeouts (OSError) and dropped
+# IMAP connections. Other IMAP4.error responses, e.g. bad credentials, are not.
+TRANSIENT_ERRORS = (OSError, imaplib.IMAP4.abort)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of contacting a server that keeps failing"""
+
+
+def backoff_delay(attempt: int, base: float = 0.5, maximum: float = 8.0) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (1-based)"""
+    return random.uniform(0, min(maximum, base * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        """
+        Fail fast after repeated failures
+
+        After failure_threshold consecutive failures the circuit opens and
+        calls are rejected for reset_timeout seconds. Then one trial call is
+        let through: success closes the circuit, failure opens it again.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds to stay open before allowing a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self) -> bool:
+        """Whether a call may go out now"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def release(self):
+        """End a trial call without a verdict, e.g. when it failed for a local reason"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class FetchMetrics:
+    def __init__(self, window: int = 1000):
+        """
+        Thread-safe counters and latency samples per IMAP operation
+
+        Args:
+            window: Latency samples kept per operation
+        """
+        self.window = window
+        self.calls = {}
+        self.failures = {}
+        self.retries = {}
+        self.latencies = {}
+        self.rejected = 0
+        self.parse_failures = 0
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, seconds: float, failed: bool = False):
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            if failed:
+                self.failures[operation] = self.failures.get(operation, 0) + 1
+            self.latencies.setdefault(operation, deque(maxlen=self.window)).append(seconds)
+
+    def record_retry(self, operation: str):
+        with self._lock:
+            self.retries[operation] = self.retries.get(operation, 0) + 1
+
+    def record_rejection(self):
+        with self._lock:
+            self.rejected += 1
+
+    def record_parse_failure(self):
+        with self._lock:
+            self.parse_failures += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Snapshot with call, failure and retry counts and p50/p95/max latency in ms"""
+        with self._lock:
+            operations = {}
+            for operation, samples in self.latencies.items():
+                ordered = sorted(samples)
+                operations[operation] = {
+                    'calls': self.calls.get(operation, 0),
+                    'failures': self.failures.get(operation, 0),
+                    'retries': self.retries.get(operation, 0),
+                    'p50_ms': round(ordered[len(ordered) // 2] * 1000, 1),
+                    'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+                    'max_ms': round(ordered[-1] * 1000, 1)
+                }
+            return {
+                'operations': operations,
+                'retries': sum(self.retries.values()),
+                'rejected': self.rejected,
+                'parse_failures': self.parse_failures
+            }
@@ -0,0 +1,46 @@
+import hashlib
+import os
+import tempfile
+
+# Default location, next to agent_memory.json
+STEALTH_IMAGE_DIR = "stealth_images"
+
+
+class StealthImageStore:
+    def __init__(self, directory: str = STEALTH_IMAGE_DIR):
+        """
+        Content-addressed on-disk store for encoded stealth log images
+
+        Images (PNG, WebP or atlases, see ENCODING_PROFILES) are saved once
+        under their SHA-256, so log entries only need to carry the hash and
+        identical images share one file. Files have no suffix; readers
+        detect the format from the bytes.
+
+        Args:
+            directory: Folder holding the images, created on first write
+        """
+        self.directory = directory
+
+    def path(self, image_hash: str) -> str:
+        return os.path.join(self.directory, image_hash[:2], image_hash)
+
+    def __contains__(self, image_hash) -> bool:
+        return os.path.exists(self.path(image_hash))
+
+    def put(self, image_bytes: bytes) -> str:
+        """Save encoded image bytes and return their hash"""
+        image_hash = hashlib.sha256(image_bytes).hexdigest()
+        if image_hash not in self:
+            path = self.path(image_hash)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(image_bytes)
+            os.replace(tmp_path, path)
+        return image_hash
+
+    def get(self, image_hash: str) -> bytes:
+        """Image bytes for a hash; raises FileNotFoundError when missing"""
+        with open(self.path(image_hash), 'rb') as f:
+            return f.read()
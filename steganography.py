@@ -3,39 +3,263 @@ import numpy as np
 import json
 import base64
 import io
+import os
+import struct
+import zlib
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+# Upper bound on payload bytes the extractor reads before giving up
+MAX_PAYLOAD_BYTES = 64 * 1024
+
+# Decoded payloads remembered per module, keyed by image hash
+DECODE_CACHE_SIZE = 256
+
+# Batches smaller than this are rendered inline, pool start-up would dominate
+PARALLEL_THRESHOLD = 32
+
+# Payload header: magic, version, flags, payload length, CRC32 of the payload.
+# It is always written 1 bit per channel byte so readers can find it; the
+# flags record how the body that follows is laid out:
+#   bit 0     zlib-compressed body
+#   bits 1-2  bits per channel byte minus one (1-4 LSBs)
+#   bits 4-7  channels carrying the body (R=1, G=2, B=4, A=8; 0 means all)
+# Version 1 headers only ever use 1 bit over all channels.
+STEGO_MAGIC = b'SG'
+STEGO_VERSION = 2
+FLAG_ZLIB = 0x01
+HEADER = struct.Struct('>2sBBII')
+HEADER_BITS = HEADER.size * 8
+MAX_BIT_DEPTH = 4
+CHANNEL_BITS = {'R': 1, 'G': 2, 'B': 4, 'A': 8}
+
+# Atlas layout: header (magic, version, flags, record count), then one
+# (offset, length) index entry per record, then the packed payloads
+ATLAS_MAGIC = b'SA'
+ATLAS_VERSION = 1
+ATLAS_HEADER = struct.Struct('>2sBBI')
+ATLAS_INDEX_ENTRY = struct.Struct('>II')
+ATLAS_WIDTH = 256
+
+# Decoded atlas pixel arrays kept per module
+ATLAS_CACHE_SIZE = 8
+
+# Image encodings for stealth logs; every profile must round-trip the LSB
+# payload exactly (see benchmark_stego.py for per-stage numbers)
+ENCODING_PROFILES = {
+    'png': {'format': 'PNG'},
+    'png-fast': {'format': 'PNG', 'compress_level': 1},
+    'png-small': {'format': 'PNG', 'compress_level': 9},
+    'png-palette': {'format': 'PNG', 'compress_level': 1, 'palette': True},
+    # exact keeps the RGB values of fully transparent pixels, which carry payload bits
+    'webp-lossless': {'format': 'WEBP', 'lossless': True, 'exact': True, 'quality': 0, 'method': 0},
+}
+# png-fast: ~2.5x quicker to encode than the zlib default for ~40% more bytes
+DEFAULT_ENCODING = 'png-fast'
+
+# Confidence image layout
+IMAGE_SIZE = (200, 100)
+TEXT_COLOR = (0, 0, 0, 255)
+TEXT_X = 10
+CONFIDENCE_Y, ACTION_Y, SENDER_Y = 10, 30, 50
+CONFIDENCE_LABEL, ACTION_LABEL, SENDER_LABEL = "Confidence: ", "Action: ", "From: "
+
+
+@lru_cache(maxsize=1)
+def get_font():
+    """Label font, resolved once per process"""
+    # Try to use a default font, fallback to default if not available
+    try:
+        return ImageFont.truetype("arial.ttf", 12)
+    except OSError:
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=1)
+def confidence_template():
+    """Transparent canvas with the static labels already drawn"""
+    image = Image.new('RGBA', IMAGE_SIZE, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    draw.text((TEXT_X, CONFIDENCE_Y), CONFIDENCE_LABEL, fill=TEXT_COLOR, font=get_font())
+    draw.text((TEXT_X, SENDER_Y), SENDER_LABEL, fill=TEXT_COLOR, font=get_font())
+    return image
+
+
+@lru_cache(maxsize=32)
+def action_strip(action):
+    """Pre-rendered 'Action: ...' line, pasted into place"""
+    strip = Image.new('RGBA', (IMAGE_SIZE[0] - TEXT_X, ACTION_Y - CONFIDENCE_Y), (0, 0, 0, 0))
+    ImageDraw.Draw(strip).text((0, 0), ACTION_LABEL + action, fill=TEXT_COLOR, font=get_font())
+    return strip
+
+
+@lru_cache(maxsize=1)
+def label_widths():
+    font = get_font()
+    return round(font.getlength(CONFIDENCE_LABEL)), round(font.getlength(SENDER_LABEL))
+
+
+def read_lsb_bytes(flat_array, offset, count):
+    """Pack the least significant bits of a byte range of the payload stream"""
+    return np.packbits(flat_array[offset * 8:(offset + count) * 8] & 1).tobytes()
+
+
+def channel_mask(channels):
+    """Header mask for channel letters such as 'RGB'; 'RGBA' (all) is 0"""
+    mask = 0
+    for channel in channels.upper():
+        if channel not in CHANNEL_BITS:
+            raise ValueError(f"Unknown channel {channel!r}, use R, G, B or A")
+        mask |= CHANNEL_BITS[channel]
+    return 0 if mask == 0x0F else mask
+
+
+def body_layout(flags):
+    """(bits per channel byte, channel mask) of the body described by header flags"""
+    return ((flags >> 1) & 0x03) + 1, flags >> 4
+
+
+def pack_payload(data, compress=True, bit_depth=1, mask=0):
+    """Serialize data as header + UTF-8 JSON, zlib-compressed when that is smaller"""
+    if not 1 <= bit_depth <= MAX_BIT_DEPTH:
+        raise ValueError(f"bit_depth must be 1-{MAX_BIT_DEPTH}")
+    body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    flags = (bit_depth - 1) << 1 | mask << 4
+    if compress:
+        packed = zlib.compress(body, 9)
+        if len(packed) < len(body):
+            body, flags = packed, flags | FLAG_ZLIB
+    # Plain layouts stay readable by version 1 readers
+    version = 1 if bit_depth == 1 and not mask else STEGO_VERSION
+    return HEADER.pack(STEGO_MAGIC, version, flags, len(body), zlib.crc32(body)) + body
+
+
+def body_slots(shape, bit_depth, mask, bit_count):
+    """
+    Flat indices of the channel bytes that carry bit_count body bits
+
+    The body starts right after the header and walks pixels in order,
+    using only the masked channels.
+    """
+    channel_count = shape[2] if len(shape) == 3 else 1
+    columns = [k for k in range(4) if mask >> k & 1] if mask else list(range(channel_count))
+    if columns[-1] >= channel_count:
+        raise ValueError("Channel mask selects a channel the image does not have")
+    slot_count = -(-bit_count // bit_depth)
+    pixel_count = -(-slot_count // len(columns))
+    first_pixel = HEADER_BITS // channel_count
+    pixels = np.arange(first_pixel, first_pixel + pixel_count) * channel_count
+    return (pixels[:, None] + np.array(columns)).reshape(-1)[:slot_count]
+
+
+def body_capacity(shape, bit_depth=1, mask=0):
+    """Body bytes an image of this array shape can hold"""
+    channel_count = shape[2] if len(shape) == 3 else 1
+    used_channels = bin(mask).count('1') if mask else channel_count
+    pixels = shape[0] * shape[1] - HEADER_BITS // channel_count
+    return max(0, pixels * used_channels * bit_depth // 8)
+
+
+def fit_payload(data, capacity, compress=True, bit_depth=1, mask=0):
+    """
+    Copy of a log payload trimmed so its body fits capacity bytes
+
+    Only the optional fields shrink: keywords are dropped from the end
+    first, then the explanation is shortened. Each is cut as little as
+    possible (binary search, since compressed size is not linear).
+    """
+    data = dict(data)
+    
+    def fits():
+        return len(pack_payload(data, compress, bit_depth, mask)) - HEADER.size <= capacity
+    
+    for field in ('keywords', 'explanation'):
+        if fits():
+            break
+        full = data.get(field)
+        if not full:
+            continue
+        low, high = 0, len(full)
+        while low < high:
+            middle = (low + high + 1) // 2
+            data[field] = full[:middle]
+            if fits():
+                low = middle
+            else:
+                high = middle - 1
+        data[field] = full[:low]
+    return data
+
+
+def unpack_header(header_bytes):
+    """Return (version, flags, length, crc) or None when the bytes are not a payload header"""
+    if len(header_bytes) < HEADER.size:
+        return None
+    magic, version, flags, length, crc = HEADER.unpack(header_bytes[:HEADER.size])
+    if magic != STEGO_MAGIC or version > STEGO_VERSION:
+        return None
+    return version, flags, length, crc
+
+
+def unpack_body(body, flags, crc):
+    """Verify and decode a payload body; None when it is corrupt"""
+    if zlib.crc32(body) != crc:
+        return None
+    try:
+        if flags & FLAG_ZLIB:
+            body = zlib.decompress(body)
+        return json.loads(body.decode('utf-8'))
+    except (zlib.error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def _render_log(item):
+    settings, email_data, prediction_result = item
+    return SteganographyModule(*settings).generate_stealth_log(email_data, prediction_result)
+
+
+def palette_image(image):
+    """
+    Exact palette copy of an RGBA image, or None with over 256 colours
+
+    Every distinct RGBA value gets its own palette entry, so unlike
+    Image.quantize no pixel (and no payload bit) changes.
+    """
+    pixels = np.asarray(image.convert('RGBA'), dtype=np.uint8)
+    colors, indices = np.unique(pixels.reshape(-1, 4).view('<u4'), return_inverse=True)
+    if colors.size > 256:
+        return None
+    paletted = Image.fromarray(indices.astype(np.uint8).reshape(pixels.shape[:2]), mode='P')
+    paletted.putpalette(colors.astype('<u4').tobytes(), rawmode='RGBA')
+    return paletted
+
 
 class SteganographyModule:
-    def __init__(self):
+    def __init__(self, image_store=None, bit_depth=1, channels='RGBA', encoding=DEFAULT_ENCODING):
+        """
+        Args:
+            image_store: Optional StealthImageStore; log entries then hold an
+                'image_hash' instead of an inline base64 image
+            bit_depth: Least significant bits used per channel byte (1-4)
+            channels: Channels carrying the payload, e.g. 'RGB' leaves alpha untouched
+            encoding: Name of the ENCODING_PROFILES entry used to store images
+        """
         self.confidence_data = {}
+        self.image_store = image_store
+        self.bit_depth = bit_depth
+        self.channels = channels
+        self.encoding = encoding
+        self.decode_cache = OrderedDict()
+        self.atlas_cache = OrderedDict()
     
-    def create_confidence_image(self, confidence_score, email_data, action):
+    def create_confidence_image(self, confidence_score, email_data, action, embedded_data=None):
         """Create a transparent PNG with embedded confidence data"""
-        # Create a transparent image
-        width, height = 200, 100
-        image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(image)
-        
-        # Try to use a default font, fallback to default if not available
-        try:
-            font = ImageFont.truetype("arial.ttf", 12)
-        except:
-            font = ImageFont.load_default()
-        
-        # Draw confidence score
-        confidence_text = f"Confidence: {confidence_score:.3f}"
-        draw.text((10, 10), confidence_text, fill=(0, 0, 0, 255), font=font)
-        
-        # Draw action
-        action_text = f"Action: {action}"
-        draw.text((10, 30), action_text, fill=(0, 0, 0, 255), font=font)
-        
-        # Draw sender (truncated)
-        sender = email_data.get('sender', '')[:20]
-        sender_text = f"From: {sender}"
-        draw.text((10, 50), sender_text, fill=(0, 0, 0, 255), font=font)
+        image = self.render_confidence_image(confidence_score, email_data, action)
         
         # Embed data in pixel values (steganography)
-        image = self.embed_data_in_image(image, {
+        return self.embed_data_in_image(image, embedded_data or {
             'confidence': confidence_score,
             'action': action,
             'sender': email_data.get('sender', ''),
@@ -43,85 +267,177 @@ class SteganographyModule:
             'timestamp': email_data.get('timestamp', ''),
             'email_id': email_data.get('id', '')
         })
+    
+    def render_confidence_image(self, confidence_score, email_data, action):
+        """Draw the visible confidence card, without any embedded data"""
+        # Start from the cached canvas with the static labels
+        image = confidence_template().copy()
+        image.paste(action_strip(action), (TEXT_X, ACTION_Y))
+        
+        # Only the values change per email
+        confidence_width, sender_width = label_widths()
+        draw = ImageDraw.Draw(image)
+        draw.text((TEXT_X + confidence_width, CONFIDENCE_Y), f"{confidence_score:.3f}", fill=TEXT_COLOR, font=get_font())
+        
+        # Draw sender (truncated)
+        sender = email_data.get('sender', '')[:20]
+        draw.text((TEXT_X + sender_width, SENDER_Y), sender, fill=TEXT_COLOR, font=get_font())
         
         return image
     
-    def embed_data_in_image(self, image, data):
+    def embed_data_in_image(self, image, data, compress=True, bit_depth=None, channels=None):
         """Embed data in the least significant bits of pixel values"""
-        # Convert data to binary string
-        data_str = json.dumps(data)
-        data_binary = ''.join(format(ord(char), '08b') for char in data_str)
-        data_binary += '00000000'  # Null terminator
-        
-        # Convert image to numpy array
-        img_array = np.array(image)
+        bit_depth = bit_depth or self.bit_depth
+        mask = channel_mask(channels or self.channels)
+        payload = pack_payload(data, compress, bit_depth, mask)
         
-        # Flatten the array
-        flat_array = img_array.flatten()
+        # Copy of the pixel data as one flat channel-byte array
+        img_array = np.array(image, dtype=np.uint8)
+        flat_array = img_array.reshape(-1)
         
         # Check if we have enough pixels
-        if len(flat_array) < len(data_binary):
-            raise ValueError("Image too small to embed data")
+        body = payload[HEADER.size:]
+        capacity = body_capacity(img_array.shape, bit_depth, mask)
+        if len(body) > capacity:
+            raise ValueError(f"Image too small to embed data ({len(body)} bytes, room for {capacity})")
         
-        # Embed data in least significant bits
-        for i, bit in enumerate(data_binary):
-            if i < len(flat_array):
-                # Clear the least significant bit and set it to our data bit
-                flat_array[i] = (flat_array[i] & 0xFE) | int(bit)
+        # Header: one bit in each of the first channel bytes
+        header_bits = np.unpackbits(np.frombuffer(payload[:HEADER.size], dtype=np.uint8))
+        target = flat_array[:HEADER_BITS]
+        np.bitwise_or(target & 0xFE, header_bits, out=target)
         
-        # Reshape back to image dimensions
-        img_array = flat_array.reshape(img_array.shape)
+        # Body: bit_depth bits per masked channel byte, written in one pass
+        bits = np.unpackbits(np.frombuffer(body, dtype=np.uint8))
+        bits = np.concatenate([bits, np.zeros(-bits.size % bit_depth, dtype=np.uint8)])
+        values = bits.reshape(-1, bit_depth) @ (1 << np.arange(bit_depth - 1, -1, -1)).astype(np.uint8)
+        slots = body_slots(img_array.shape, bit_depth, mask, bits.size)
+        low_bits = (1 << bit_depth) - 1
+        flat_array[slots] = (flat_array[slots] & (0xFF ^ low_bits)) | values.astype(np.uint8)
         
         # Convert back to PIL Image
-        return Image.fromarray(img_array.astype(np.uint8))
-    
-    def extract_data_from_image(self, image):
-        """Extract embedded data from image"""
-        # Convert image to numpy array
-        img_array = np.array(image)
-        flat_array = img_array.flatten()
-        
-        # Extract binary data
-        binary_data = ""
-        for pixel in flat_array:
-            # Get least significant bit
-            bit = pixel & 1
-            binary_data += str(bit)
-            
-            # Check for null terminator (8 consecutive zeros)
-            if len(binary_data) >= 8 and binary_data[-8:] == '00000000':
-                break
+        return Image.fromarray(img_array)
+    
+    def extract_data_from_image(self, image, max_bytes=MAX_PAYLOAD_BYTES):
+        """Extract embedded data from image, reading at most max_bytes of payload"""
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        img_array = np.asarray(image, dtype=np.uint8)
+        flat_array = img_array.reshape(-1)
         
-        # Remove null terminator
-        binary_data = binary_data[:-8]
+        header = unpack_header(read_lsb_bytes(flat_array, 0, HEADER.size))
+        if header is None:
+            return self.extract_legacy_data(flat_array, max_bytes)
         
-        # Convert binary to string
-        if len(binary_data) % 8 != 0:
+        # Read exactly the announced payload, if it fits the image and the cap
+        _, flags, length, crc = header
+        bit_depth, mask = body_layout(flags)
+        try:
+            if length > max_bytes or length > body_capacity(img_array.shape, bit_depth, mask):
+                return None
+            slots = body_slots(img_array.shape, bit_depth, mask, length * 8)
+        except (ValueError, IndexError):
             return None
         
-        # Convert binary to characters
-        data_str = ""
-        for i in range(0, len(binary_data), 8):
-            byte = binary_data[i:i+8]
-            data_str += chr(int(byte, 2))
+        # Spread each slot's low bits back into a bit stream, most significant first
+        shifts = np.arange(bit_depth - 1, -1, -1, dtype=np.uint8)
+        bits = ((flat_array[slots][:, None] >> shifts) & 1).reshape(-1)[:length * 8]
+        return unpack_body(np.packbits(bits).tobytes(), flags, crc)
+    
+    def extract_legacy_data(self, flat_array, max_bytes=MAX_PAYLOAD_BYTES):
+        """Read the original null-terminated JSON format"""
+        bit_count = min(flat_array.size, (max_bytes + 1) * 8) // 8 * 8
+        
+        # Pack the bits back into bytes and find the byte-aligned null terminator
+        data = np.packbits(flat_array[:bit_count] & 1).tobytes()
+        end = data.find(b'\x00')
+        if end == -1:
+            return None
         
         try:
-            return json.loads(data_str)
-        except:
+            return json.loads(data[:end].decode())
+        except (UnicodeDecodeError, ValueError):
+            return None
+    
+    def create_atlas(self, records, compress=True):
+        """
+        Pack many payloads into one carrier image behind an index table
+        
+        Each record keeps its own payload header and CRC, so any one of them
+        can be read by offset without touching the others.
+        """
+        blobs = [pack_payload(record, compress) for record in records]
+        offset = ATLAS_HEADER.size + ATLAS_INDEX_ENTRY.size * len(blobs)
+        index = []
+        for blob in blobs:
+            index.append(ATLAS_INDEX_ENTRY.pack(offset, len(blob)))
+            offset += len(blob)
+        stream = ATLAS_HEADER.pack(ATLAS_MAGIC, ATLAS_VERSION, 0, len(blobs)) + b''.join(index) + b''.join(blobs)
+        
+        # Transparent RGBA canvas just tall enough for one bit per channel byte
+        bits = np.unpackbits(np.frombuffer(stream, dtype=np.uint8))
+        height = max(1, -(-bits.size // (ATLAS_WIDTH * 4)))
+        flat_array = np.zeros(ATLAS_WIDTH * height * 4, dtype=np.uint8)
+        flat_array[:bits.size] = bits
+        return Image.fromarray(flat_array.reshape(height, ATLAS_WIDTH, 4))
+    
+    def read_atlas_index(self, image):
+        """(offset, length) of every record in an atlas"""
+        flat_array = np.asarray(image, dtype=np.uint8).reshape(-1)
+        count = self._atlas_count(flat_array)
+        table = read_lsb_bytes(flat_array, ATLAS_HEADER.size, ATLAS_INDEX_ENTRY.size * count)
+        return list(ATLAS_INDEX_ENTRY.iter_unpack(table))
+    
+    def extract_atlas_record(self, image, index, max_bytes=MAX_PAYLOAD_BYTES):
+        """Read one record from an atlas; only its index entry and payload bits are unpacked"""
+        flat_array = np.asarray(image, dtype=np.uint8).reshape(-1)
+        if not 0 <= index < self._atlas_count(flat_array):
+            raise IndexError(f"Atlas has no record {index}")
+        
+        entry_offset = ATLAS_HEADER.size + ATLAS_INDEX_ENTRY.size * index
+        offset, length = ATLAS_INDEX_ENTRY.unpack(read_lsb_bytes(flat_array, entry_offset, ATLAS_INDEX_ENTRY.size))
+        if length > max_bytes or (offset + length) * 8 > flat_array.size:
             return None
+        
+        blob = read_lsb_bytes(flat_array, offset, length)
+        header = unpack_header(blob)
+        if header is None:
+            return None
+        _, flags, body_length, crc = header
+        return unpack_body(blob[HEADER.size:HEADER.size + body_length], flags, crc)
+    
+    def _atlas_count(self, flat_array):
+        magic, version, _, count = ATLAS_HEADER.unpack(read_lsb_bytes(flat_array, 0, ATLAS_HEADER.size))
+        if magic != ATLAS_MAGIC or version > ATLAS_VERSION:
+            raise ValueError("Image is not a stealth atlas")
+        return count
+    
+    def encode_image(self, image, profile=None):
+        """Encode a PIL image with an ENCODING_PROFILES entry (the module's by default)"""
+        options = dict(ENCODING_PROFILES[profile or self.encoding])
+        if options.pop('palette', False):
+            image = palette_image(image) or image
+        buffer = io.BytesIO()
+        image.save(buffer, **options)
+        return buffer.getvalue()
     
     def image_to_base64(self, image):
         """Convert PIL image to base64 string"""
-        buffer = io.BytesIO()
-        image.save(buffer, format='PNG')
-        img_str = base64.b64encode(buffer.getvalue()).decode()
-        return img_str
+        return base64.b64encode(self.encode_image(image)).decode()
     
     def base64_to_image(self, base64_str):
         """Convert base64 string to PIL image"""
         img_data = base64.b64decode(base64_str)
         return Image.open(io.BytesIO(img_data))
     
+    def load_image(self, stealth_entry):
+        """Confidence image (or atlas) of a log entry, from the image store or the inline base64"""
+        for hash_field, inline_field in (('atlas_hash', 'atlas_image'), ('image_hash', 'confidence_image')):
+            if hash_field in stealth_entry:
+                return Image.open(io.BytesIO(self.image_store.get(stealth_entry[hash_field])))
+            if inline_field in stealth_entry:
+                return self.base64_to_image(stealth_entry[inline_field])
+        raise KeyError("Stealth entry has no image")
+    
     def create_emoji_trigger(self, action, confidence):
         """Create emoji-based trigger for agent behavior"""
         emoji_triggers = {
@@ -147,16 +463,36 @@ class SteganographyModule:
     
     def generate_stealth_log(self, email_data, prediction_result):
         """Generate a stealth log entry with embedded data"""
+        stealth_entry = self.stealth_entry(email_data, prediction_result)
+        
+        # Long emails can have thousands of keywords; keep what the card can hold
+        # (atlas records have no such limit and are stored whole)
+        card_shape = (IMAGE_SIZE[1], IMAGE_SIZE[0], 4)
+        mask = channel_mask(self.channels)
+        stealth_entry['embedded_data'] = fit_payload(
+            stealth_entry['embedded_data'], body_capacity(card_shape, self.bit_depth, mask),
+            bit_depth=self.bit_depth, mask=mask
+        )
+        
         # Create confidence image
         confidence_image = self.create_confidence_image(
             prediction_result['confidence'],
             email_data,
-            prediction_result['action']
+            prediction_result['action'],
+            stealth_entry['embedded_data']
         )
         
-        # Convert to base64 for storage
-        image_base64 = self.image_to_base64(confidence_image)
-        
+        stealth_entry.update(self.store_image(self.encode_image(confidence_image), 'image_hash', 'confidence_image'))
+        return stealth_entry
+    
+    def store_image(self, image_bytes, hash_field, inline_field):
+        """Store the encoded image out of band when a store is configured, else inline as base64"""
+        if self.image_store is not None:
+            return {hash_field: self.image_store.put(image_bytes)}
+        return {inline_field: base64.b64encode(image_bytes).decode()}
+    
+    def stealth_entry(self, email_data, prediction_result):
+        """Log entry fields shared by per-email images and atlases"""
         # Create emoji trigger
         emoji_trigger = self.create_emoji_trigger(
             prediction_result['action'],
@@ -173,27 +509,104 @@ class SteganographyModule:
             'confidence': prediction_result['confidence'],
             'explanation': prediction_result['explanation'],
             'emoji_trigger': emoji_trigger,
-            'confidence_image': image_base64,
             'embedded_data': {
                 'confidence': prediction_result['confidence'],
                 'action': prediction_result['action'],
                 'sender': email_data.get('sender', ''),
                 'subject': email_data.get('subject', ''),
                 'timestamp': email_data.get('timestamp', ''),
-                'email_id': email_data.get('id', '')
+                'email_id': email_data.get('id', ''),
+                'explanation': prediction_result.get('explanation', ''),
+                'keywords': list(prediction_result.get('keywords', []))
             }
         }
         
         return stealth_entry
     
+    def generate_stealth_atlas(self, emails, predictions):
+        """
+        Generate log entries for a batch that share one atlas image
+        
+        No confidence images are rendered; each entry records the atlas
+        ('atlas_hash' or inline 'atlas_image') and its 'atlas_index'.
+        """
+        entries = [self.stealth_entry(email_data, prediction) for email_data, prediction in zip(emails, predictions)]
+        atlas = self.create_atlas([entry['embedded_data'] for entry in entries])
+        atlas_fields = self.store_image(self.encode_image(atlas), 'atlas_hash', 'atlas_image')
+        for index, entry in enumerate(entries):
+            entry.update(atlas_fields, atlas_index=index)
+        return entries
+    
+    def atlas_array(self, stealth_entry):
+        """Pixel array of an entry's atlas, decoded once and shared by its records"""
+        key = stealth_entry.get('atlas_hash') or hashlib.sha256(stealth_entry['atlas_image'].encode()).hexdigest()
+        if key in self.atlas_cache:
+            self.atlas_cache.move_to_end(key)
+        else:
+            self.atlas_cache[key] = np.asarray(self.load_image(stealth_entry), dtype=np.uint8)
+            if len(self.atlas_cache) > ATLAS_CACHE_SIZE:
+                self.atlas_cache.popitem(last=False)
+        return self.atlas_cache[key]
+    
+    def image_key(self, stealth_entry):
+        """Content hash identifying the entry's image (and record, for atlases)"""
+        if 'atlas_index' in stealth_entry:
+            atlas_key = stealth_entry.get('atlas_hash') or hashlib.sha256(stealth_entry['atlas_image'].encode()).hexdigest()
+            return f"{atlas_key}#{stealth_entry['atlas_index']}"
+        if 'image_hash' in stealth_entry:
+            return stealth_entry['image_hash']
+        return hashlib.sha256(stealth_entry['confidence_image'].encode()).hexdigest()
+    
+    def is_decoded(self, stealth_entry):
+        """Whether decode_stealth_data can answer from the cache"""
+        return self.image_key(stealth_entry) in self.decode_cache
+    
+    def generate_stealth_logs(self, emails, predictions, max_workers=None, executor=None):
+        """
+        Generate stealth log entries for many emails, in input order
+        
+        Rendering, embedding and PNG encoding are CPU-bound, so large batches
+        are spread over a process pool in chunks; small ones run inline.
+        
+        Args:
+            emails: Email dicts
+            predictions: Matching predict_action results
+            max_workers: Pool size, defaults to the number of CPUs
+            executor: Reuse an existing pool instead of starting one
+        """
+        settings = (self.image_store, self.bit_depth, self.channels, self.encoding)
+        items = [(settings, email_data, prediction) for email_data, prediction in zip(emails, predictions)]
+        workers = max_workers or os.cpu_count() or 1
+        if executor is None and (workers == 1 or len(items) < PARALLEL_THRESHOLD):
+            return [self.generate_stealth_log(email_data, prediction) for _, email_data, prediction in items]
+        
+        chunksize = max(1, len(items) // (workers * 4))
+        if executor is not None:
+            return list(executor.map(_render_log, items, chunksize=chunksize))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_render_log, items, chunksize=chunksize))
+    
     def decode_stealth_data(self, stealth_entry):
-        """Decode stealth data from log entry"""
+        """Decode stealth data from log entry, once per distinct image"""
         try:
-            # Convert base64 image back to PIL Image
-            image = self.base64_to_image(stealth_entry['confidence_image'])
-            
-            # Extract embedded data
-            extracted_data = self.extract_data_from_image(image)
+            key = self.image_key(stealth_entry)
+            if key in self.decode_cache:
+                self.decode_cache.move_to_end(key)
+                extracted_data = self.decode_cache[key]
+            else:
+                if 'atlas_index' in stealth_entry:
+                    # Read just this record from the shared atlas
+                    extracted_data = self.extract_atlas_record(self.atlas_array(stealth_entry),
+                                                               stealth_entry['atlas_index'])
+                else:
+                    # Load the PNG back as a PIL Image
+                    image = self.load_image(stealth_entry)
+                    
+                    # Extract embedded data
+                    extracted_data = self.extract_data_from_image(image)
+                self.decode_cache[key] = extracted_data
+                if len(self.decode_cache) > DECODE_CACHE_SIZE:
+                    self.decode_cache.popitem(last=False)
             
             return {
                 'original_data': stealth_entry['embedded_data'],
@@ -206,4 +619,4 @@ class SteganographyModule:
                 'error': str(e),
                 'original_data': stealth_entry['embedded_data'],
                 'emoji_trigger': stealth_entry['emoji_trigger']
-            } 
\ No newline at end of file
+            }
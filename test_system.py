@@ -12,7 +12,19 @@ from datetime import datetime
 try:
     from cognitive_agent import CognitiveAgent
     from email_simulator import EmailSimulator
-    from steganography import SteganographyModule
+    from steganography import SteganographyModule, pack_payload, HEADER, ENCODING_PROFILES
+    from stealth_store import StealthImageStore
+    from email_fetcher import RealEmailFetcher
+    from async_email_fetcher import AsyncEmailFetcher, GMAIL_CATEGORIES
+    from fake_imap_server import FakeIMAPServer, GMAIL_CAPABILITIES, make_self_signed_context
+    from email_query import EmailQuery
+    from mime_parser import parse_raw_email, parse_email_batch
+    from html_text import clean_text
+    from mail_importer import import_archive, iter_archive
+    from message_store import MessageStore
+    from fetch_worker import FetchJob
+    from feedback_store import FeedbackStore
+    from resilience import CircuitBreaker
     print("✅ All modules imported successfully")
 except ImportError as e:
     print(f"❌ Import error: {e}")
@@ -41,7 +53,9 @@ def test_cognitive_agent():
     print(f"✅ Explanation: {prediction['explanation']}")
     
     # Test feedback
+    version = agent.feedback_version
     feedback = agent.receive_feedback(test_email, prediction['action'], 'approve')
+    assert agent.feedback_version == version + 1
     print(f"✅ Feedback recorded: {feedback['reward']} reward")
     
     # Test statistics
@@ -50,6 +64,102 @@ def test_cognitive_agent():
     
     return True
 
+def test_shared_agent():
+    """Test one agent serving concurrent sessions"""
+    print("\n🔒 Testing Shared Agent...")
+    
+    from concurrent.futures import ThreadPoolExecutor
+    
+    agent = CognitiveAgent()
+    start_feedback = len(agent.feedback_history)
+    emails = [EmailSimulator().generate_email() for _ in range(20)]
+    
+    # Predictions never add keys to the agent's memory
+    unseen = dict(emails[0], sender='nobody@unseen.example')
+    agent.predict_action(unseen)
+    assert 'nobody@unseen.example' not in agent.sender_memory
+    states = len(agent.q_table)
+    agent.predict_action(dict(unseen, subject='Brand new state?'))
+    assert len(agent.q_table) == states
+    
+    # Many readers alongside serialized writers
+    def session(index):
+        prediction = agent.predict_action(emails[index])
+        agent.get_statistics()
+        if index % 4 == 0:
+            agent.receive_feedback(emails[index], prediction['action'], 'approve')
+        return prediction['action']
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        actions = list(pool.map(session, range(len(emails))))
+    assert all(action in agent.actions for action in actions)
+    assert len(agent.feedback_history) == start_feedback + 5
+    print(f"✅ {len(emails)} concurrent sessions, {len(agent.feedback_history) - start_feedback} serialized updates")
+    
+    # A waiting writer is not starved by new readers
+    import threading
+    order = []
+    with agent.lock.read():
+        writer = threading.Thread(target=lambda: agent.set_parameters(agent.learning_rate, agent.epsilon) or order.append('write'))
+        writer.start()
+        while not agent.lock._writers_waiting:
+            pass
+        reader = threading.Thread(target=lambda: agent.get_statistics() and order.append('read'))
+        reader.start()
+    writer.join()
+    reader.join()
+    assert order == ['write', 'read'], order
+    print("✅ Writers are preferred over newly arriving readers")
+    
+    return True
+
+def test_feedback_store():
+    """Test the paged SQLite feedback history"""
+    print("\n🗄️ Testing Feedback Store...")
+    
+    store = FeedbackStore(':memory:')
+    assert store.summary() == {'total': 0, 'approvals': 0, 'unique_senders': 0, 'avg_reward': 0, 'avg_confidence': 0}
+    
+    store.extend({
+        'timestamp': datetime(2025, 1, 1, n // 3600 % 24).isoformat(),
+        'sender': f"sender{n % 7}@example.com",
+        'subject': f"Message {n}",
+        'predicted_action': 'Reply',
+        'user_feedback': 'approve' if n % 3 else 'reject',
+        'correct_action': 'Reply',
+        'reward': 2.0 if n % 3 else -2.0,
+        'confidence': 0.5
+    } for n in range(100_000))
+    
+    assert len(store) == 100_000
+    assert store.count(feedback='reject') == 33_334
+    assert store.count(sender='sender3@example.com', feedback='approve') == len(
+        [n for n in range(100_000) if n % 7 == 3 and n % 3])
+    assert store.senders() == [f"sender{n}@example.com" for n in range(7)]
+    
+    # Pages come newest first and hold only the requested rows
+    first = store.page(0, 50)
+    assert len(first) == 50 and first[0]['subject'] == 'Message 99999'
+    filtered = store.page(100, 25, sender='sender0@example.com', feedback='reject')
+    assert len(filtered) == 25
+    assert all(e['sender'] == 'sender0@example.com' and e['user_feedback'] == 'reject' for e in filtered)
+    assert store.page(99_990, 50)[-1]['subject'] == 'Message 0'
+    
+    summary = store.summary()
+    assert summary['approvals'] == 66_666 and summary['unique_senders'] == 7
+    assert store.top('sender', 2) == [('sender0@example.com', 14_286), ('sender1@example.com', 14_286)]
+    assert [e['subject'] for e in store.recent(2)] == ['Message 99998', 'Message 99999']
+    
+    # The agent keeps its statistics and history in one store
+    agent = CognitiveAgent(history=store)
+    stats = agent.get_statistics()
+    assert stats['total_feedback'] == 100_000 and stats['approval_rate'] == 0.667
+    assert stats['top_senders'][0] == ('sender0@example.com', 14_286)
+    print(f"✅ {summary['total']} entries, {len(filtered)}-row filtered page")
+    
+    store.close()
+    return True
+
 def test_email_simulator():
     """Test the email simulator functionality"""
     print("\n📧 Testing Email Simulator...")
@@ -99,8 +209,110 @@ def test_steganography():
     stealth_entry = stego.generate_stealth_log(test_email, prediction)
     print(f"✅ Generated stealth log with emoji: {stealth_entry['emoji_trigger']}")
     
+    # A long newsletter's keyword list is trimmed to fit the card instead of failing
+    import random
+    rng = random.Random(7)
+    words = sorted({''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(8)) for _ in range(3000)})
+    long_email = dict(test_email, id='long_1', body=' '.join(words))
+    long_prediction = dict(prediction, keywords=words, explanation="Keywords: " + ", ".join(words[:3]))
+    long_entry = stego.generate_stealth_log(long_email, long_prediction)
+    kept = long_entry['embedded_data']['keywords']
+    assert 0 < len(kept) < len(words) and kept == words[:len(kept)]
+    assert stego.decode_stealth_data(long_entry)['data_match']
+    atlas_entry = stego.generate_stealth_atlas([long_email], [long_prediction])[0]
+    assert atlas_entry['embedded_data']['keywords'] == words
+    print(f"✅ Long email kept {len(kept)} of {len(words)} keywords (all of them in an atlas)")
+    
+    # Embedding only touches the payload's bits and round-trips exactly
+    import numpy as np
+    from PIL import Image
+    blank = Image.new('RGBA', (200, 100), (0, 0, 0, 0))
+    payload = {'sender': 'test@example.com', 'action': 'Reply'}
+    embedded = stego.embed_data_in_image(blank, payload)
+    assert embedded.mode == 'RGBA' and embedded.size == blank.size
+    payload_bits = len(pack_payload(payload)) * 8
+    assert not np.array(embedded).reshape(-1)[payload_bits:].any()
+    assert stego.extract_data_from_image(embedded) == payload
+    
+    # Non-ASCII metadata survives, and a flipped bit is caught by the CRC
+    unicode_payload = {'sender': 'Jürgen Müller <jürgen@exämple.de>', 'subject': 'Grüße 🎉 日本語'}
+    embedded_unicode = stego.embed_data_in_image(blank, unicode_payload)
+    assert stego.extract_data_from_image(embedded_unicode) == unicode_payload
+    corrupted = np.array(embedded_unicode)
+    corrupted.reshape(-1)[payload_bits // 2] ^= 1
+    assert stego.extract_data_from_image(Image.fromarray(corrupted)) is None
+    
+    # Deeper LSBs on selected channels: the header records the layout, alpha stays untouched
+    large_payload = {'explanation': 'Because ' * 400, 'keywords': [f"keyword{n}" for n in range(1500)]}
+    try:
+        stego.embed_data_in_image(blank, large_payload, compress=False)
+        assert False, "1-bit embedding should not fit"
+    except ValueError:
+        pass
+    deep_stego = SteganographyModule(bit_depth=4, channels='RGB')
+    deep = deep_stego.embed_data_in_image(blank, large_payload, compress=False)
+    assert not np.array(deep)[:, :, 3].reshape(-1)[HEADER.size * 8 // 4:].any()
+    assert stego.extract_data_from_image(deep) == large_payload
+    
+    # Every encoding profile stores the payload bits losslessly
+    import io
+    for profile in ENCODING_PROFILES:
+        for carrier in (embedded, deep):
+            encoded = Image.open(io.BytesIO(stego.encode_image(carrier, profile)))
+            assert stego.extract_data_from_image(encoded) == stego.extract_data_from_image(carrier), profile
+    
+    # Images written in the old null-terminated format still decode
+    legacy = np.array(blank)
+    legacy_bits = np.unpackbits(np.frombuffer(json.dumps(payload).encode() + b'\x00', dtype=np.uint8))
+    legacy.reshape(-1)[:legacy_bits.size] |= legacy_bits
+    assert stego.extract_data_from_image(Image.fromarray(legacy)) == payload
+    
+    # Extraction is bounded: no terminator within the cap means no data
+    assert stego.extract_data_from_image(Image.new('RGBA', (200, 100), (255, 255, 255, 255))) is None
+    assert stego.extract_data_from_image(embedded, max_bytes=10) is None
+    
     # Test data decoding
     decoded = stego.decode_stealth_data(stealth_entry)
+    assert decoded.get('data_match'), decoded
+    
+    # Batched generation keeps input order, inline or across processes
+    batch = [dict(test_email, id=f"batch_{n}", subject=f"Batch {n}") for n in range(40)]
+    batch_predictions = [dict(prediction, confidence=n / 40) for n in range(40)]
+    inline_entries = stego.generate_stealth_logs(batch[:3], batch_predictions[:3])
+    pooled_entries = stego.generate_stealth_logs(batch, batch_predictions, max_workers=2)
+    assert [e['subject'] for e in pooled_entries] == [e['subject'] for e in batch]
+    assert pooled_entries[:3] == inline_entries
+    
+    # Atlas mode: one carrier image, any record readable on its own
+    atlas_entries = stego.generate_stealth_atlas(batch, batch_predictions)
+    assert len({e['atlas_image'] for e in atlas_entries}) == 1
+    atlas_image = stego.load_image(atlas_entries[0])
+    assert len(stego.read_atlas_index(atlas_image)) == len(batch)
+    assert stego.extract_atlas_record(atlas_image, 17) == atlas_entries[17]['embedded_data']
+    assert all(stego.decode_stealth_data(e)['data_match'] for e in atlas_entries)
+    assert len(atlas_entries[0]['atlas_image']) < sum(len(e['confidence_image']) for e in pooled_entries) / 5
+    
+    # With an image store, entries carry only the content hash
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        stored_stego = SteganographyModule(image_store=StealthImageStore(tmp))
+        stored_entry = stored_stego.generate_stealth_log(test_email, prediction)
+        assert 'confidence_image' not in stored_entry
+        assert stored_entry['image_hash'] in stored_stego.image_store
+        assert stored_stego.generate_stealth_log(test_email, prediction)['image_hash'] == stored_entry['image_hash']
+        assert stored_stego.decode_stealth_data(stored_entry)['data_match']
+        
+        # Any encoding can be stored; files are named by hash alone
+        import os
+        webp_bytes = stego.encode_image(embedded, 'webp-lossless')
+        webp_hash = stored_stego.image_store.put(webp_bytes)
+        assert os.path.basename(stored_stego.image_store.path(webp_hash)) == webp_hash
+        assert webp_hash in stored_stego.image_store and stored_stego.image_store.get(webp_hash) == webp_bytes
+        
+        # Decoded images are cached by hash: no disk or pixel work the second time
+        assert stored_stego.is_decoded(stored_entry)
+        stored_stego.load_image = None
+        assert stored_stego.decode_stealth_data(stored_entry)['data_match']
     if 'error' not in decoded:
         print("✅ Stealth data decoded successfully")
         print(f"✅ Extracted action: {decoded['extracted_data']['action']}")
@@ -109,6 +321,438 @@ def test_steganography():
     
     return True
 
+def test_async_fetcher():
+    """Test concurrent fetching across folders and accounts"""
+    print("\n⚡ Testing Async Email Fetcher...")
+    
+    import time
+    
+    # Gmail inbox tabs are searches on INBOX, not folders
+    with FakeIMAPServer(capabilities=GMAIL_CAPABILITIES, latency={'SORT': 0.3}) as server:
+        for category in ('primary', 'updates', 'promotions'):
+            for i in range(2):
+                server.deliver(make_raw_email("news@example.com", f"{category} {i}"), labels=[category])
+        accounts = [
+            RealEmailFetcher(address, "pw", imap_server=server.host, imap_port=server.port, use_ssl=False)
+            for address in ("a@example.com", "b@example.com")
+        ]
+        fetcher = AsyncEmailFetcher(accounts, folders=GMAIL_CATEGORIES, max_concurrency=6)
+        
+        started = time.perf_counter()
+        emails = fetcher.fetch_all_sync()
+        elapsed = time.perf_counter() - started
+    
+    assert len(emails) == 12
+    assert {(e['account'], e['source']) for e in emails} == set(fetcher.timings)
+    for e in emails:
+        assert e['folder'] == 'INBOX' and e['source'] == f"INBOX category:{e['subject'].split()[0]}", e['source']
+    # Six 0.3s searches in parallel should finish well before 1.8s of serial waiting
+    assert elapsed < 1.2, f"fetch took {elapsed:.2f}s"
+    print(f"✅ Fetched {len(emails)} emails from 6 Gmail category searches in {elapsed:.2f}s")
+    
+    return True
+
+def make_raw_email(sender, subject, body="Hello,\n\nJust checking in.\n", date="Mon, 04 Aug 2025 09:30:00 +0000"):
+    """Build a minimal RFC822 message for the fake IMAP server"""
+    return (
+        f"From: {sender}\r\n"
+        f"To: me@example.com\r\n"
+        f"Subject: {subject}\r\n"
+        f"Date: {date}\r\n"
+        f"Message-ID: <{abs(hash(subject))}@example.com>\r\n"
+        f"Content-Type: text/plain; charset=utf-8\r\n"
+        f"\r\n{body}"
+    ).encode()
+
+def test_idle_watch():
+    """Test IDLE push mode against the fake IMAP server"""
+    print("\n📡 Testing IMAP IDLE Watch...")
+    
+    import threading
+    import time
+    
+    agent = CognitiveAgent()
+    
+    with FakeIMAPServer() as server:
+        server.deliver(make_raw_email("old@example.com", "Already here"))
+        fetcher = RealEmailFetcher("me@example.com", "pw", imap_server=server.host,
+                                   imap_port=server.port, use_ssl=False)
+        
+        predicted = []
+        stop_event = threading.Event()
+        watcher = threading.Thread(
+            target=fetcher.watch,
+            kwargs={'agent': agent, 'stop_event': stop_event,
+                    'on_prediction': lambda email, prediction: predicted.append(email['subject'])}
+        )
+        watcher.start()
+        time.sleep(0.3)
+        
+        server.deliver(make_raw_email("boss@example.com", "URGENT: budget question?"))
+        server.deliver(make_raw_email("news@example.com", "Weekly newsletter"))
+        
+        deadline = time.monotonic() + 5
+        while len(predicted) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        stop_event.set()
+        watcher.join(timeout=5)
+    
+    assert not watcher.is_alive()
+    assert predicted == ["URGENT: budget question?", "Weekly newsletter"], predicted
+    print(f"✅ Predicted {len(predicted)} pushed emails")
+    
+    return True
+
+def test_fake_server_tls():
+    """Test fetching over TLS with injected server latency"""
+    print("\n🔐 Testing Fake IMAP Server over TLS...")
+    
+    import time
+    
+    server_context, client_context = make_self_signed_context()
+    with FakeIMAPServer(ssl_context=server_context, latency={'UID FETCH': 0.1}) as server:
+        server.seed_from_simulator(5)
+        fetcher = RealEmailFetcher("me@example.com", "pw", imap_server='localhost',
+                                   imap_port=server.port, ssl_context=client_context)
+        
+        started = time.perf_counter()
+        emails = fetcher.fetch_recent_emails(5)
+        elapsed = time.perf_counter() - started
+    
+    assert len(emails) == 5
+    assert all(e['real_email'] and e['subject'] for e in emails)
+    # One batched FETCH pays the injected latency once
+    assert 0.1 <= elapsed < 1.0, f"fetch took {elapsed:.2f}s"
+    print(f"✅ Fetched {len(emails)} emails over TLS in {elapsed:.2f}s")
+    
+    return True
+
+def test_server_side_search():
+    """Test that EmailQuery filters and sorts on the IMAP server"""
+    print("\n🔎 Testing Server-Side Search...")
+    
+    class RecordingServer(FakeIMAPServer):
+        commands = []
+        
+        def pause(self, command):
+            self.commands.append(command)
+    
+    for capabilities in (GMAIL_CAPABILITIES, "IMAP4rev1 IDLE X-GM-EXT-1"):
+        with RecordingServer(capabilities=capabilities) as server:
+            # Delivered out of date order so only a real sort gets them right
+            server.deliver(make_raw_email("boss@corp.com", "Q3 plan", date="Wed, 06 Aug 2025 10:00:00 +0000"))
+            server.deliver(make_raw_email("boss@corp.com", "Q1 plan", date="Mon, 04 Aug 2025 10:00:00 +0000"),
+                           flags=["\\Seen"])
+            server.deliver(make_raw_email("boss@corp.com", "Q2 plan", date="Tue, 05 Aug 2025 10:00:00 +0000"))
+            server.deliver(make_raw_email("ads@shop.com", "Big sale"), labels=["promotions"])
+            server.deliver(make_raw_email("boss@corp.com", "Old news", date="Mon, 02 Jun 2025 10:00:00 +0000"))
+            
+            fetcher = RealEmailFetcher("me@example.com", "pw", imap_server=server.host,
+                                       imap_port=server.port, use_ssl=False)
+            
+            query = EmailQuery(sender="boss@corp.com", since="2025-08-01", unseen=True)
+            emails = fetcher.search_emails(query, limit=10)
+            subjects = [e['subject'] for e in emails]
+            if 'SORT' in capabilities:
+                assert subjects == ["Q2 plan", "Q3 plan"], subjects
+            else:
+                assert sorted(subjects) == ["Q2 plan", "Q3 plan"], subjects
+            
+            promotions = fetcher.search_emails(EmailQuery(gmail_raw="category:promotions"))
+            assert [e['subject'] for e in promotions] == ["Big sale"]
+            
+            # Matches are fetched in one batched round trip, never one by one
+            assert sum(command.startswith('UID') for command in server.commands) == 4, server.commands
+            RecordingServer.commands = []
+    
+    print(f"✅ Server-side query returned {subjects}")
+    
+    return True
+
+def test_message_store():
+    """Test that refreshes only download messages the store has not seen"""
+    print("\n🗂️ Testing Message Store Deduplication...")
+    
+    class RecordingServer(FakeIMAPServer):
+        commands = []
+        
+        def pause(self, command):
+            self.commands.append(command)
+    
+    agent = CognitiveAgent()
+    for capabilities in ("IMAP4rev1 IDLE SORT", GMAIL_CAPABILITIES):
+        RecordingServer.commands = []
+        with RecordingServer(capabilities=capabilities) as server:
+            for i in range(3):
+                server.deliver(make_raw_email("team@example.com", f"Standup {i}"))
+            fetcher = RealEmailFetcher("me@example.com", "pw", imap_server=server.host,
+                                       imap_port=server.port, use_ssl=False)
+            store = MessageStore()
+            
+            emails, added = store.sync(fetcher)
+            assert added == 3 and len(store) == 3
+            first_prediction = store.predict(agent, emails[0])
+            
+            # Nothing new: only the header-only key FETCH goes out
+            RecordingServer.commands = []
+            refreshed, added = store.sync(fetcher)
+            assert added == 0
+            assert [e['subject'] for e in refreshed] == [e['subject'] for e in emails]
+            assert refreshed[0] is emails[0], "known messages must not be re-parsed"
+            assert store.predict(agent, refreshed[0]) is first_prediction
+            assert RecordingServer.commands.count('UID FETCH') == 1, RecordingServer.commands
+            
+            server.deliver(make_raw_email("team@example.com", "Standup 3"))
+            refreshed, added = store.sync(fetcher)
+            assert added == 1 and len(refreshed) == 4
+            if 'X-GM-EXT-1' in capabilities:
+                assert all(e['message_key'].startswith('gm:') for e in refreshed)
+    
+    # Feedback invalidates cached predictions
+    agent.receive_feedback(refreshed[0], first_prediction['action'], 'approve')
+    assert store.predict(agent, refreshed[0]) is not first_prediction
+    print(f"✅ Second refresh downloaded {added} new email of {len(refreshed)}")
+    
+    return True
+
+def test_background_fetch():
+    """Test that a fetch job runs off the caller's thread and delivers emails as they are parsed"""
+    print("\n🧵 Testing Background Fetch...")
+    
+    import time
+    
+    with FakeIMAPServer(latency={'UID FETCH': 0.2}) as server:
+        for i in range(25):
+            server.deliver(make_raw_email("team@example.com", f"Standup {i}"))
+        fetcher = RealEmailFetcher("me@example.com", "pw", imap_server=server.host,
+                                   imap_port=server.port, use_ssl=False)
+        store = MessageStore()
+        
+        start = time.perf_counter()
+        job = FetchJob(fetcher, 'ALL', 25, known=set(store.messages)).start()
+        assert time.perf_counter() - start < 0.1 and not job.done
+        
+        # Poll like the UI does, merging whatever has arrived
+        partial = []
+        while not job.done:
+            arrived = job.take_new()
+            store.merge(arrived)
+            if arrived and len(store) < 25:
+                partial.append(len(store))
+            time.sleep(0.05)
+        store.merge(job.take_new())
+        
+        assert partial, "emails should arrive before the fetch ends"
+        assert len(job.keys) == 25 and len(store) == 25
+        assert {e['subject'] for e in store.get_many(job.keys)} == {f"Standup {i}" for i in range(25)}
+        print(f"✅ {len(store)} emails in {job.elapsed:.2f}s, first {partial[0]} visible early")
+        
+        # Nothing new: the next job downloads no bodies
+        job = FetchJob(fetcher, 'ALL', 25, known=set(store.messages)).start()
+        assert job.wait(10)
+        assert len(job.keys) == 25 and job.take_new() == []
+    
+    return True
+
+def test_fetch_resilience():
+    """Test read timeouts, retry and the circuit breaker against a stalling server"""
+    print("\n🛡️ Testing Fetch Timeouts and Circuit Breaker...")
+    
+    import time
+    
+    class StallingServer(FakeIMAPServer):
+        commands = []
+        stalls = 1
+        
+        def pause(self, command):
+            self.commands.append(command)
+            if command == 'UID FETCH' and StallingServer.stalls:
+                StallingServer.stalls -= 1
+                time.sleep(0.5)
+    
+    with StallingServer() as server:
+        server.seed_from_simulator(3)
+        fetcher = RealEmailFetcher("me@example.com", "pw", imap_server=server.host, imap_port=server.port,
+                                   use_ssl=False, read_timeout=0.2, max_retries=1, backoff_base=0.01,
+                                   breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+        
+        # One stalled FETCH times out and is retried on a fresh connection
+        emails = fetcher.fetch_recent_emails(3)
+        assert len(emails) == 3
+        metrics = fetcher.metrics.as_dict()
+        assert metrics['retries'] == 1 and metrics['operations']['fetch']['failures'] == 1, metrics
+        
+        # A failure that outlasts the retries opens the circuit...
+        StallingServer.stalls = 2
+        started = time.perf_counter()
+        assert fetcher.fetch_recent_emails(3) == []
+        assert time.perf_counter() - started < 1.5, "timeouts must bound the fetch"
+        assert fetcher.breaker.state == 'open'
+        
+        # ...and later calls fail fast without touching the server
+        StallingServer.commands = []
+        assert fetcher.fetch_recent_emails(3) == []
+        assert StallingServer.commands == [] and fetcher.metrics.rejected == 1
+    
+    # A half-open trial that ends in a non-transient error still frees the circuit
+    import imaplib
+    
+    def refused():
+        raise imaplib.IMAP4.error("LOGIN failed")
+    
+    def broken():
+        raise ValueError("local bug")
+    
+    for failing, state in ((broken, 'half-open'), (refused, 'closed')):
+        fetcher.breaker.reset_timeout = 0
+        assert fetcher.breaker.state == 'half-open'
+        try:
+            fetcher._run('login', failing)
+            assert False, "error should propagate"
+        except (imaplib.IMAP4.error, ValueError):
+            pass
+        assert fetcher.breaker.state == state and fetcher.breaker.allow(), failing.__name__
+        fetcher.breaker.record_failure()
+    
+    print(f"✅ Retried {metrics['retries']} stalled fetch, circuit now {fetcher.breaker.state}")
+    
+    return True
+
+def make_multipart_email(attachment_size=1_000_000):
+    """Build a text + html message with a large attachment after the body"""
+    from email.message import EmailMessage
+    
+    message = EmailMessage()
+    message['From'] = '=?utf-8?q?J=C3=B6rg?= <joerg@example.de>'
+    message['Subject'] = 'Urgent: quarterly report'
+    message['Date'] = 'Mon, 04 Aug 2025 09:30:00 +0000'
+    message['Message-ID'] = '<report@example.de>'
+    message.set_content("Please review the report [image: chart].")
+    message.add_alternative("<p>Please review the <b>report</b>.</p>", subtype='html')
+    message.add_attachment(b'\0' * attachment_size, maintype='application',
+                           subtype='octet-stream', filename='report.bin')
+    return message.as_bytes()
+
+def test_mime_parser():
+    """Test the streaming MIME parser and batch decoding"""
+    print("\n🧾 Testing Streaming MIME Parser...")
+    
+    raw = make_multipart_email()
+    parsed = parse_raw_email(raw, 1)
+    
+    assert parsed['sender'] == 'Jörg <joerg@example.de>'
+    assert parsed['body'] == 'Please review the report .'
+    assert parsed['priority'] == 'high'
+    assert [a['name'] for a in parsed['attachments']] == ['report.bin']
+    assert parsed['attachments'][0]['size'] > 1_000_000  # base64-encoded size
+    print(f"✅ Parsed body: {parsed['body']}")
+    
+    batch = parse_email_batch([(i, raw) for i in range(80)], max_workers=4, use_processes=False)
+    assert len(batch) == 80 and all(email['message_id'] == '<report@example.de>' for email in batch)
+    print(f"✅ Parsed batch of {len(batch)} emails in parallel")
+    
+    # Large live fetches parse in the shared pool, 64 messages per FETCH round trip
+    import mime_parser
+    from concurrent.futures import ThreadPoolExecutor
+    from unittest import mock
+    
+    class CountingServer(FakeIMAPServer):
+        fetches = 0
+        
+        def pause(self, command):
+            if command == 'UID FETCH':
+                CountingServer.fetches += 1
+    
+    with CountingServer() as server, ThreadPoolExecutor(max_workers=2) as pool:
+        for i in range(70):
+            server.deliver(make_raw_email("bulk@example.com", f"Bulk {i}"))
+        fetcher = RealEmailFetcher("me@example.com", "pw", imap_server=server.host,
+                                   imap_port=server.port, use_ssl=False)
+        with mock.patch('mime_parser.shared_executor', return_value=pool) as shared:
+            assert len(fetcher.fetch_recent_emails(70)) == 70
+            assert shared.called and CountingServer.fetches == 2
+            CountingServer.fetches = 0
+            assert len(fetcher.fetch_recent_emails(10)) == 10
+            assert shared.call_count == 1 and CountingServer.fetches == 1
+    with mock.patch('mime_parser.os.cpu_count', return_value=1):
+        assert mime_parser.shared_executor() is None
+    print("✅ Large fetches use the shared parser pool")
+    
+    return True
+
+def test_html_cleaner():
+    """Test the html.parser based text cleaner"""
+    print("\n🧹 Testing HTML Text Cleaner...")
+    
+    html = (
+        "<html><head><style>p {color: red}</style></head><body>"
+        "<p>Hi&nbsp;there,</p><p>[image: logo] Big   sale &amp; more</p>"
+        "<div>Visit https://shop.example.com now</div><script>track()</script></body></html>"
+    )
+    text = clean_text(html)
+    assert text == "Hi there,\n\nBig sale & more\n\nVisit 🔗 https://shop.example.com now", repr(text)
+    print(f"✅ Cleaned HTML: {text!r}")
+    
+    # Output is capped and unclosed brackets stay linear
+    capped = clean_text("<td>Offer [code [limited</td>" * 20000, max_chars=500)
+    assert len(capped) <= 500
+    print(f"✅ Capped output at {len(capped)} characters")
+    
+    # Plain text skips the parser but is cleaned the same way
+    plain = "Hi  there,\n\n\n[image: logo] See https://example.com [x]"
+    assert clean_text(plain) == "Hi there,\n\nSee 🔗 https://example.com", repr(clean_text(plain))
+    assert clean_text(plain) == clean_text(plain + "<br>").rstrip()
+    print("✅ Plain text takes the fast path")
+    
+    return True
+
+def test_mail_importer():
+    """Test streaming import from mbox and .eml archives"""
+    print("\n📦 Testing Offline Mail Importer...")
+    
+    import os
+    import tempfile
+    
+    with tempfile.TemporaryDirectory() as folder:
+        mbox_path = os.path.join(folder, "archive.mbox")
+        with open(mbox_path, 'wb') as f:
+            for i in range(3):
+                f.write(b"From sender@example.com Mon Aug  4 09:30:00 2025\n")
+                f.write(make_raw_email("sender@example.com", f"Archived {i}",
+                                       body="Hi,\n>From the archive\n").replace(b"\r\n", b"\n"))
+                f.write(b"\n")
+        
+        emails = list(iter_archive(mbox_path))
+        assert [e['subject'] for e in emails] == ["Archived 0", "Archived 1", "Archived 2"]
+        assert emails[0]['body'] == "Hi,\nFrom the archive"
+        assert emails[0]['real_email'] and 'attachments' in emails[0]
+        
+        eml_dir = os.path.join(folder, "eml")
+        os.makedirs(os.path.join(eml_dir, "nested"))
+        with open(os.path.join(eml_dir, "nested", "one.eml"), 'wb') as f:
+            f.write(make_multipart_email(attachment_size=1000))
+        
+        agent = CognitiveAgent()
+        predictions = []
+        stats = import_archive(eml_dir, agent, lambda email, prediction: predictions.append(prediction['action']),
+                               workers=1, report_every=0)
+        assert stats['messages'] == 1 and len(predictions) == 1
+        
+        # workers=1 parses inline even on multi-core machines
+        from unittest import mock
+        big_mbox = os.path.join(folder, "big.mbox")
+        with open(big_mbox, 'wb') as f:
+            for i in range(100):
+                f.write(b"From sender@example.com Mon Aug  4 09:30:00 2025\n")
+                f.write(make_raw_email("sender@example.com", f"Bulk {i}").replace(b"\r\n", b"\n") + b"\n")
+        with mock.patch('mime_parser.os.cpu_count', return_value=4), \
+                mock.patch('mime_parser.ProcessPoolExecutor', side_effect=AssertionError("pool started")):
+            assert import_archive(big_mbox, workers=1, report_every=0)['messages'] == 100
+    
+    print(f"✅ Imported {len(emails)} mbox emails and {stats['messages']} .eml file")
+    
+    return True
+
 def test_integration():
     """Test full system integration"""
     print("\n🔗 Testing System Integration...")
@@ -148,8 +792,20 @@ def main():
     
     tests = [
         test_cognitive_agent,
+        test_shared_agent,
+        test_feedback_store,
         test_email_simulator,
         test_steganography,
+        test_async_fetcher,
+        test_idle_watch,
+        test_fake_server_tls,
+        test_server_side_search,
+        test_message_store,
+        test_background_fetch,
+        test_fetch_resilience,
+        test_mime_parser,
+        test_html_cleaner,
+        test_mail_importer,
         test_integration
     ]
     